@@ -0,0 +1,59 @@
+"""
+Pack the raw QuickDraw dumps into a single shard that MyDataset can memory-map directly
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+from src.config import CLASSES
+from src.dataset import IMAGE_SIZE, SHARD_HEADER, SHARD_IMAGES, SHARD_LABELS, get_split
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        """Convert full_numpy_bitmap_*.npy files into a compact training shard""")
+    parser.add_argument("--total_images_per_class", type=int, default=10000)
+    parser.add_argument("--ratio", type=float, default=0.8, help="the ratio between training and test sets")
+    parser.add_argument("--data_path", type=str, default="data", help="the folder holding the raw dumps")
+    parser.add_argument("--output_path", type=str, default="data/shard", help="the folder the shard is written to")
+    args = parser.parse_args()
+    return args
+
+
+def convert(opt):
+    splits = {mode: get_split(opt.total_images_per_class, opt.ratio, mode) for mode in ["train", "test"]}
+    num_samples = sum(num_images for _, num_images in splits.values()) * len(CLASSES)
+    os.makedirs(opt.output_path, exist_ok=True)
+
+    images = np.lib.format.open_memmap(os.path.join(opt.output_path, SHARD_IMAGES), mode="w+",
+                                       dtype=np.uint8, shape=(num_samples, IMAGE_SIZE * IMAGE_SIZE))
+    labels = np.empty(num_samples, dtype=np.int16)
+    header = {"classes": CLASSES, "total_images_per_class": opt.total_images_per_class, "ratio": opt.ratio,
+              "image_size": IMAGE_SIZE, "splits": {}}
+
+    # Every split is stored class-major and back to back, so a split is one contiguous block of rows
+    row = 0
+    for mode, (offset, num_images) in splits.items():
+        header["splits"][mode] = {"offset": row, "num_images_per_class": num_images}
+        for class_idx, class_name in enumerate(CLASSES):
+            dump = np.load("{}/full_numpy_bitmap_{}.npy".format(opt.data_path, class_name), mmap_mode="r")
+            if len(dump) < offset + num_images:
+                raise ValueError("{} only has {} images, {} are needed".format(class_name, len(dump), offset + num_images))
+            images[row:row + num_images] = dump[offset:offset + num_images]
+            labels[row:row + num_images] = class_idx
+            row += num_images
+        print("{}: {} images".format(mode, num_images * len(CLASSES)))
+
+    images.flush()
+    del images
+    np.save(os.path.join(opt.output_path, SHARD_LABELS), labels)
+    with open(os.path.join(opt.output_path, SHARD_HEADER), "w") as f:
+        json.dump(header, f, indent=2)
+    print("shard written to {}".format(opt.output_path))
+
+
+if __name__ == "__main__":
+    opt = get_args()
+    convert(opt)
@@ -0,0 +1,77 @@
+"""
+Export a trained QuickDraw checkpoint to a self-contained ONNX artifact for the game
+"""
+import argparse
+import json
+
+import onnx
+import torch
+import torch.nn as nn
+
+from src.checkpoint import load_checkpoint
+from src.config import CLASSES, LEGACY_CLASSES
+from src.model import QuickDraw, QuickDrawSequence
+from src.recognizer import ONNX_MODEL_PATH
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        """Export a trained Quick Draw model to ONNX with its class list embedded""")
+    parser.add_argument("--checkpoint", type=str, default="trained_models/best_model.pt",
+                        help="a state_dict checkpoint from train.py, or a legacy whole_model_quickdraw file "
+                             "(labelled with CLASSES or LEGACY_CLASSES from src/config.py, by its number of outputs)")
+    parser.add_argument("--output", type=str, default=ONNX_MODEL_PATH)
+    parser.add_argument("--opset", type=int, default=17)
+    args = parser.parse_args()
+    return args
+
+
+def load_model(path):
+    """Return (model, classes) from a train.py checkpoint.
+
+    Checkpoints with ``"arch": "sequence"`` hold a QuickDrawSequence trained on stroke data.
+    """
+    checkpoint = load_checkpoint(path)
+    if isinstance(checkpoint, nn.Module):
+        # whole_model_quickdraw pickles the module itself and predates class lists in checkpoints,
+        # its output size tells which class list it was trained on
+        num_outputs = checkpoint.fc3[0].out_features
+        for classes in (CLASSES, LEGACY_CLASSES):
+            if len(classes) == num_outputs:
+                return checkpoint.float().eval(), classes
+        raise ValueError("{} has {} outputs, which matches neither CLASSES ({}) nor LEGACY_CLASSES ({})".format(
+            path, num_outputs, len(CLASSES), len(LEGACY_CLASSES)))
+    classes = checkpoint["classes"]
+    if checkpoint.get("arch", "image") == "sequence":
+        model = QuickDrawSequence(num_classes=len(classes))
+    else:
+        model = QuickDraw(num_classes=len(classes))
+    model.load_state_dict(checkpoint["model"])
+    return model.eval(), classes
+
+
+def export(opt):
+    model, classes = load_model(opt.checkpoint)
+    if isinstance(model, QuickDrawSequence):
+        dummy_input, input_kind, layout = torch.zeros(1, 16, 3), "strokes", "NLC"
+        dynamic_axes = {"input": {0: "batch", 1: "length"}, "probabilities": {0: "batch"}}
+    else:
+        dummy_input, input_kind, layout = torch.zeros(1, 1, 28, 28), "image", "NCHW"
+        dynamic_axes = {"input": {0: "batch"}, "probabilities": {0: "batch"}}
+    # The artifact outputs probabilities so the runtime never has to know about logits
+    model = nn.Sequential(model, nn.Softmax(dim=1)).eval()
+    torch.onnx.export(model, dummy_input, opt.output, opset_version=opt.opset,
+                      input_names=["input"], output_names=["probabilities"], dynamic_axes=dynamic_axes)
+
+    onnx_model = onnx.load(opt.output)
+    for key, value in [("classes", json.dumps(classes)), ("input", input_kind), ("layout", layout)]:
+        entry = onnx_model.metadata_props.add()
+        entry.key = key
+        entry.value = value
+    onnx.save(onnx_model, opt.output)
+    print("exported {} classes to {}".format(len(classes), opt.output))
+
+
+if __name__ == "__main__":
+    opt = get_args()
+    export(opt)
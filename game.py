@@ -1,22 +1,27 @@
-import cv2
+import argparse
 import random
-from collections import deque
-import mediapipe as mp
+import time
+# Mốc thời gian khởi động, dùng để đo thời gian đến frame đầu tiên
+BOOT_START = time.perf_counter()
 import numpy as np
-import tensorflow as tf
 import pygame
 from pygame.locals import *
 import os
 import json
-import pyttsx3
-import threading  # Thêm cho TTS không freeze
+from src.boot import BackgroundLoader
+from src.camera import CameraStream
+from src.live import LiveGuesser
+from src.particles import ParticleSystem
+from src.preprocess import preprocess_canvas
+from src.presenter import FramePresenter
+from src.recognizer import Recognizer
+from src.render import DirtySurface, TextCache
+from src.replay import SessionRecorder
+from src.speech import SpeechWorker
+from src.stroke import StrokeBuffer
+from src.timing import MetricsExporter, StageTimer
+from src.tracking import HandTracker
 
-mp_drawing = mp.solutions.drawing_utils
-mp_drawing_styles = mp.solutions.drawing_styles
-mp_hands = mp.solutions.hands
-
-# Load model
-model = tf.keras.models.load_model("models/quickdraw_model.h5")
 with open('class_names.txt', 'r') as f:
     CLASSES = f.read().splitlines()
 
@@ -28,6 +33,21 @@ TIME_DECREASE_PER_LEVEL = 3
 MAX_LEVELS = 15
 LIVES = 3
 STREAK_BONUS = 2
+# Nhận diện tay chạy trên thread riêng ở độ phân giải này, bỏ qua TRACKING_FRAME_SKIP frame giữa hai lần xử lý
+TRACKING_SIZE = (320, 240)
+TRACKING_FRAME_SKIP = 0
+# Đoán trực tiếp khi đang vẽ: chạy lại model mỗi LIVE_GUESS_INTERVAL giây hoặc mỗi LIVE_GUESS_POINTS điểm mới
+# trên thread riêng (tối đa LIVE_GUESS_BUDGET thời gian của thread cho inference), tự nộp bài khi đủ tự tin
+LIVE_GUESS = True
+LIVE_GUESS_INTERVAL = 0.15
+LIVE_GUESS_POINTS = 8
+LIVE_GUESS_BUDGET = 0.5
+LIVE_GUESS_THRESHOLD = 0.85
+# File WAV của gợi ý và từ vựng được lưu ở đây, lần sau phát lại ngay không cần tổng hợp
+TTS_CACHE_DIR = "tts_cache"
+# Bảng thời gian từng bước (F3 để bật/tắt), ghi ra file metrics mỗi METRICS_INTERVAL giây nếu có --metrics
+DEBUG_KEY = K_F3
+METRICS_INTERVAL = 10.0
 WORD_LIST = CLASSES
 
 # Màu sắc
@@ -44,6 +64,7 @@ PARTICLE_COLORS = [
     (200, 100, 255), (255, 255, 100),
     (100, 255, 255), (255, 100, 255)
 ]
+PARTICLE_CAPACITY = 1024
 
 # Bố cục
 INFO_HEIGHT = 120
@@ -105,13 +126,38 @@ LEVEL_WORDS = {
     8: ["baseball", "scissors"],
     9: ["bowtie", "diamond", "envelope"],
     10: ["lightning"],
-    11: ["apple", "cup", "door", "eye", "fish", "hapkt", "moon", "star"],
+    11: ["apple", "cup", "door", "eye", "fish", "hat", "moon", "star"],
     12: ["book", "leaf", "pants", "t-shirt"],
     13: ["baseball", "scissors"],
     14: ["bowtie", "diamond", "envelope"],
     15: CLASSES
 }
 
+def load_recognizer(path=None):
+    # Load model (models/quickdraw_model.onnx từ export.py nếu có, nếu không thì file .h5)
+    # path có thể là bản int8 từ quantize.py, dùng y như bản float32
+    recognizer = Recognizer(path)
+    # Chạy thử một lần qua cả bước tiền xử lý để lần nộp bài đầu tiên không bị chậm
+    if recognizer.input_kind == "strokes":
+        recognizer.top_k(np.array([[0, 0, 0], [10, 10, 1]], dtype=np.float32))
+    else:
+        canvas = np.zeros((64, 64), dtype=np.uint8)
+        stroke = StrokeBuffer(canvas, color=255)
+        stroke.append((16, 16))
+        stroke.append((48, 48))
+        recognizer.top_k(preprocess_canvas(canvas, stroke.bbox))
+    return recognizer
+
+def load_hands():
+    # mediapipe import rất chậm nên chỉ import trên thread nền
+    import mediapipe as mp
+    return mp.solutions.hands.Hands(
+        max_num_hands=1,
+        model_complexity=0,
+        min_detection_confidence=0.7,
+        min_tracking_confidence=0.7
+    )
+
 class Button:
     def __init__(self, x, y, width, height, text, **kwargs):
         self.rect = pygame.Rect(x, y, width, height)
@@ -122,6 +168,9 @@ class Button:
         self.border_radius = kwargs.get('border_radius', 12)
         self.font_size = kwargs.get('font_size', 32)
         self.font = pygame.font.SysFont("Arial", self.font_size, bold=True)
+        # Chữ trên nút không đổi nên chỉ render một lần
+        self.text_surf = self.font.render(self.text, True, self.text_color)
+        self.text_rect = self.text_surf.get_rect(center=self.rect.center)
         self.is_hovered = False
         
     def draw(self, surface):
@@ -129,9 +178,7 @@ class Button:
         shadow_rect = self.rect.move(5, 5)
         pygame.draw.rect(surface, (0, 0, 0, 100), shadow_rect, border_radius=self.border_radius)
         pygame.draw.rect(surface, color, self.rect, border_radius=self.border_radius)
-        text_surf = self.font.render(self.text, True, self.text_color)
-        text_rect = text_surf.get_rect(center=self.rect.center)
-        surface.blit(text_surf, text_rect)
+        surface.blit(self.text_surf, self.text_rect)
         
     def update(self, mouse_pos):
         self.is_hovered = self.rect.collidepoint(mouse_pos)
@@ -139,34 +186,8 @@ class Button:
     def is_clicked(self, mouse_pos, mouse_click):
         return self.rect.collidepoint(mouse_pos) and mouse_click
 
-class Particle:
-    def __init__(self, x, y, color=None):
-        self.x = x
-        self.y = y
-        self.size = random.randint(3, 8)
-        self.color = color or random.choice(PARTICLE_COLORS)
-        self.vx = random.uniform(-3, 3)
-        self.vy = random.uniform(-8, -2)
-        self.life = random.randint(30, 60)
-        self.gravity = 0.2
-        self.fade = random.uniform(2, 4)
-        
-    def update(self):
-        self.x += self.vx
-        self.y += self.vy
-        self.vy += self.gravity
-        self.life -= self.fade
-        self.size = max(0, self.size - 0.05)
-        
-    def draw(self, surface):
-        s = pygame.Surface((int(self.size*2), int(self.size*2)), pygame.SRCALPHA)
-        alpha = min(255, int(self.life * 4.25))
-        pygame.draw.circle(s, self.color, (self.size, self.size), self.size)
-        s.set_alpha(alpha)
-        surface.blit(s, (int(self.x - self.size), int(self.y - self.size)))
-
 class DrawingGame:
-    def __init__(self):
+    def __init__(self, camera=None, tracker=None, recorder=None, metrics=None, model_path=None, save_scores=True):
         pygame.init()
         pygame.mixer.init()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
@@ -179,15 +200,44 @@ class DrawingGame:
         self.main_font = pygame.font.SysFont("Arial", 36)
         self.small_font = pygame.font.SysFont("Arial", 24)
         self.ipa_font = pygame.font.SysFont("Times New Roman", 36)  # Font riêng cho IPA
-        
-        self.cap = cv2.VideoCapture(0)
-        self.points = deque(maxlen=512)
-        self.canvas = np.zeros((CAMERA_HEIGHT, CAMERA_WIDTH, 3), dtype=np.uint8)
+        self.debug_font = pygame.font.SysFont("Courier New", 18)  # Font đều nét cho bảng số liệu
+        # Chữ đã render được cache (LRU), nền tĩnh được vẽ sẵn một lần, HUD chỉ vẽ lại khi số liệu đổi
+        self.text_cache = TextCache()
+        self.hud = DirtySurface(pygame.Surface((SCREEN_WIDTH, INFO_HEIGHT), pygame.SRCALPHA))
+        self.create_backgrounds()
+        
+        # Đo thời gian từng bước của vòng lặp: capture, present, hands, stroke, recognize, draw, flip,
+        # cùng độ trễ của frame camera và số frame bị bỏ qua
+        self.timer = StageTimer()
+        self.metrics = metrics
+        self.show_debug = False
+        self.debug_overlay = None
+        self.camera_frames = 0
+        self.hands_published = 0
+        self.live_inferences = 0
+        
+        # Camera được đọc trên thread riêng, vòng lặp game chỉ lấy frame mới nhất
+        # camera/tracker có thể được thay bằng nguồn replay (xem replay.py)
+        self.camera = camera
+        self.frame_sequence = 0
+        self.frame_timestamp = None
+        # Frame camera được lật và resize thẳng vào buffer của một Surface cố định
+        self.presenter = FramePresenter((CAMERA_WIDTH, CAMERA_HEIGHT))
+        self.frame_surface = None
+        self.canvas = np.zeros((CAMERA_HEIGHT, CAMERA_WIDTH), dtype=np.uint8)
+        # Mỗi điểm mới chỉ vẽ thêm một đoạn lên canvas (cho model) và lên stroke_surface (hiển thị)
+        self.stroke = StrokeBuffer(self.canvas, color=255)
+        self.stroke_surface = pygame.Surface((CAMERA_WIDTH, CAMERA_HEIGHT), pygame.SRCALPHA)
         self.is_drawing = False
         self.is_shown = False
         self.predicted_class = None
+        # Thời gian từ frame camera có gesture nộp bài (hoặc snapshot được đoán trực tiếp) đến khi có kết quả,
+        # đo trên đồng hồ của tracker (đồng hồ session khi replay)
+        self.verdict_latencies = []
         
         self.score = 0
+        # replay.py tắt ghi highscore.json để lần chạy benchmark không đổi điểm cao của người chơi
+        self.save_scores = save_scores
         self.high_score = self.load_high_score()
         self.lives = LIVES
         self.level = 1
@@ -198,27 +248,34 @@ class DrawingGame:
         self.time_left = self.time_limit
         self.game_active = False
         self.game_over = False
-        self.particles = []
+        # Pool hạt cố định, trạng thái nằm trong mảng NumPy và sprite được vẽ sẵn
+        self.particles = ParticleSystem(PARTICLE_COLORS, PARTICLE_CAPACITY)
         self.show_word_info = False
         self.level_up_timer = 0
         self.hint_given = False
         self.shake_timer = 0
         self.success_icon_timer = 0
         
-        self.hands = mp_hands.Hands(
-            max_num_hands=1,
-            model_complexity=0,
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.7
-        )
-        
-        self.tts_engine = pyttsx3.init()
-        self.tts_engine.setProperty('rate', 150)
-        voices = self.tts_engine.getProperty('voices')
-        for voice in voices:
-            if 'english' in voice.name.lower():
-                self.tts_engine.setProperty('voice', voice.id)
-                break
+        self.recorder = recorder
+        self.tracker = tracker
+        self.tracking_active = True
+        self.hands = None
+        self.recognizer = None
+        self.live_guesser = None
+        
+        # Khởi động theo giai đoạn: menu hiện ngay, model, camera và MediaPipe được load trên thread nền
+        self.loader = BackgroundLoader().add("recognizer", lambda: load_recognizer(model_path))
+        if camera is None:
+            self.loader.add("camera", lambda: CameraStream(0).start())
+        if tracker is None:
+            self.loader.add("hand tracking", load_hands)
+        self.loader.start()
+        self.booted = False
+        self.first_frame_time = None
+        self.boot_time = None
+        
+        # Một thread TTS duy nhất giữ engine pyttsx3, câu nói được phát qua pygame.mixer
+        self.speech = SpeechWorker(TTS_CACHE_DIR).start()
         
         self.state = "menu"
         self.create_ui_elements()
@@ -232,6 +289,35 @@ class DrawingGame:
             } 
             for word in WORD_LIST
         }
+        # Tổng hợp trước gợi ý và từ vựng khi thread TTS rảnh
+        self.speech.prefetch([self.hint_text(word) for word in WORD_LIST] + WORD_LIST)
+        
+    def finish_boot(self):
+        self.recognizer = self.loader.result("recognizer")
+        # Model phải nhận diện được mọi từ của các level, nếu không người chơi sẽ không bao giờ đoán đúng
+        missing = sorted({word for words in LEVEL_WORDS.values() for word in words} - set(self.recognizer.classes))
+        if missing:
+            raise ValueError(f"{self.recognizer.path} cannot recognize the words {missing}, "
+                             f"train and export it with the classes of class_names.txt")
+        if self.recognizer.input_kind == "strokes":
+            # Model dạng chuỗi nét (strokes) đọc thẳng mảng điểm nên không cần raster lên canvas
+            self.stroke.canvas = None
+        if self.camera is None:
+            self.camera = self.loader.result("camera")
+        if self.tracker is None:
+            self.hands = self.loader.result("hand tracking")
+            self.tracker = HandTracker(self.camera, self.hands, TRACKING_SIZE, TRACKING_FRAME_SKIP,
+                                       self.recorder).start()
+        self.live_guesser = LiveGuesser(self.recognizer, LIVE_GUESS_INTERVAL, LIVE_GUESS_POINTS,
+                                        LIVE_GUESS_BUDGET).start() if LIVE_GUESS else None
+        self.booted = True
+        self.boot_time = time.perf_counter() - BOOT_START
+        loaded = ", ".join(f"{name} {duration:.2f}s" for name, duration in self.loader.durations.items())
+        print(f"Ready after {self.boot_time:.2f}s ({loaded})")
+        
+    def wait_for_boot(self):
+        self.loader.wait()
+        self.finish_boot()
         
     def generate_example(self, word):
         examples = {
@@ -256,6 +342,62 @@ class DrawingGame:
         }
         return examples.get(word, f"This is a {word}.")
         
+    def create_backgrounds(self):
+        self.menu_background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+        for y in range(SCREEN_HEIGHT):
+            color = (BG_COLOR[0] + y//30, BG_COLOR[1] + y//20, BG_COLOR[2] + y//10)
+            pygame.draw.line(self.menu_background, color, (0, y), (SCREEN_WIDTH, y))
+        title = self.title_font.render("Draw & Learn English", True, ACCENT_COLOR)
+        shadow = self.title_font.render("Draw & Learn English", True, (0, 0, 0))
+        self.menu_background.blit(shadow, (SCREEN_WIDTH//2 - title.get_width()//2 + 3, 53))
+        self.menu_background.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 50))
+        footer = self.small_font.render("Use your hand to draw in the air!", True, (200, 200, 200))
+        self.menu_background.blit(footer, (SCREEN_WIDTH//2 - footer.get_width()//2, SCREEN_HEIGHT - 50))
+        
+        self.instructions_background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+        self.instructions_background.fill(BG_COLOR)
+        title = self.header_font.render("How to Play", True, ACCENT_COLOR)
+        self.instructions_background.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 50))
+        instructions = [
+            "1. Draw the English word shown at the top",
+            "2. Use your hand in the air to draw:",
+            "   - Open hand: Draw",
+            "   - Close fingers: Submit drawing",
+            "3. Correct guesses earn points + bonuses",
+            "4. Wrong guesses lose lives",
+            "5. Level up every 5 correct answers",
+            "6. Time decreases as you level up",
+            "7. Get hints for early levels",
+            "8. Streak of 3+ correct gives bonus!"
+        ]
+        y_pos = 150
+        for line in instructions:
+            text = self.main_font.render(line, True, TEXT_COLOR)
+            self.instructions_background.blit(text, (50, y_pos))
+            y_pos += 40
+        
+        self.word_info_box = pygame.Rect(SCREEN_WIDTH//4, INFO_HEIGHT + 50, SCREEN_WIDTH//2, SCREEN_HEIGHT - INFO_HEIGHT - 200)
+        self.word_info_overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+        self.word_info_overlay.fill((0, 0, 0, 180))
+        pygame.draw.rect(self.word_info_overlay, (40, 70, 120), self.word_info_box, border_radius=15)
+        pygame.draw.rect(self.word_info_overlay, PRIMARY_COLOR, self.word_info_box, 3, border_radius=15)
+        
+        game_over_box = pygame.Rect(SCREEN_WIDTH//4, SCREEN_HEIGHT//3, SCREEN_WIDTH//2, SCREEN_HEIGHT//3)
+        self.game_over_overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+        self.game_over_overlay.fill((0, 0, 0, 200))
+        pygame.draw.rect(self.game_over_overlay, (80, 30, 30), game_over_box, border_radius=15)
+        pygame.draw.rect(self.game_over_overlay, ERROR_COLOR, game_over_box, 3, border_radius=15)
+        game_over_text = self.header_font.render("Game Over", True, ERROR_COLOR)
+        self.game_over_overlay.blit(game_over_text, (SCREEN_WIDTH//2 - game_over_text.get_width()//2, SCREEN_HEIGHT//3 + 30))
+        
+        self.success_icon = pygame.Surface((100, 100), pygame.SRCALPHA)
+        pygame.draw.circle(self.success_icon, SUCCESS_COLOR, (50, 50), 50)
+        pygame.draw.line(self.success_icon, TEXT_COLOR, (30, 50), (45, 65), 10)
+        pygame.draw.line(self.success_icon, TEXT_COLOR, (45, 65), (70, 35), 10)
+        
+    def render_text(self, font, text, color):
+        return self.text_cache.render(font, text, color)
+        
     def create_ui_elements(self):
         self.start_button = Button(
             SCREEN_WIDTH//2 - 150, 200, 300, 70, "Start Game", color=PRIMARY_COLOR)
@@ -273,6 +415,8 @@ class DrawingGame:
             SCREEN_WIDTH//2 + 40, SCREEN_HEIGHT - 100, 200, 60, "Continue", font_size=32)
         self.back_button = Button(
             SCREEN_WIDTH//2 - 100, SCREEN_HEIGHT - 80, 200, 50, "Back to Menu", font_size=28)
+        self.game_over_menu_button = Button(
+            SCREEN_WIDTH//2 - 100, SCREEN_HEIGHT//3 + 310, 200, 50, "Menu", color=PRIMARY_COLOR)
         
     def load_sounds(self):
         self.correct_sound = pygame.mixer.Sound("sounds/correct.wav") if os.path.exists("sounds/correct.wav") else None
@@ -290,16 +434,18 @@ class DrawingGame:
                     return json.load(f).get("high_score", 0)
         except:
             return 0
+        return 0
         
     def save_high_score(self):
         if self.score > self.high_score:
             self.high_score = self.score
+            if not self.save_scores:
+                return
             with open("highscore.json", "w") as f:
                 json.dump({"high_score": self.high_score}, f)
                 
     def create_particles(self, x, y, count=50):
-        for _ in range(count):
-            self.particles.append(Particle(x, y))
+        self.particles.emit(x, y, count)
             
     def reset_game(self):
         self.score = 0
@@ -312,73 +458,113 @@ class DrawingGame:
         self.time_left = self.time_limit
         self.game_active = True
         self.game_over = False
-        self.points.clear()
-        self.canvas.fill(0)
-        self.particles = []
+        self.clear_drawing()
+        self.particles.clear()
         self.show_word_info = False
         self.hint_given = False
         self.shake_timer = 0
         self.success_icon_timer = 0
         
     def speak(self, text):
-        self.tts_engine.say(text)
-        self.tts_engine.runAndWait()
+        self.speech.say(text)
+        
+    def hint_text(self, word):
+        return f"Hint: {word} means {self.word_data[word]['translation']}"
+        
+    def set_tracking(self, active):
+        # Camera và nhận diện tay chỉ chạy khi đang vẽ, menu và các màn hình khác không tốn CPU cho chúng
+        if active == self.tracking_active:
+            return
+        self.tracking_active = active
+        for stage in (self.camera, self.tracker):
+            if active:
+                stage.resume()
+            else:
+                stage.pause()
         
     def process_frame(self):
-        if not self.game_active or self.show_word_info:
+        if not self.booted:
+            return None
+        self.set_tracking(self.game_active and not self.show_word_info)
+        if not self.tracking_active:
             return None
         if not self.hint_given and self.level <= 5:
-            hint = f"Hint: {self.current_word} means {self.word_data[self.current_word]['translation']}"
-            threading.Thread(target=self.speak, args=(hint,)).start()
+            self.speak(self.hint_text(self.current_word))
             self.hint_given = True
-        success, image = self.cap.read()
-        if not success:
+        # Landmarks mới nhất từ HandTracker, không chờ nhận diện tay
+        landmarks = self.tracker.landmarks()
+        if landmarks is None:
+            # Mất tay thì kết thúc nét hiện tại, nét sau không bị nối vào
+            self.stroke.pen_up()
+        else:
+            if (landmarks[8, 1] < landmarks[7, 1] and
+                landmarks[12, 1] < landmarks[11, 1] and
+                landmarks[16, 1] < landmarks[15, 1]):
+                self.stroke.pen_up()
+                if len(self.stroke) > 10:
+                    with self.timer.measure("recognize"):
+                        self.recognize_drawing(started=self.tracker.latest[1])
+            else:
+                self.is_drawing = True
+                pt = (int(landmarks[8, 0] * CAMERA_WIDTH),
+                      int(landmarks[8, 1] * CAMERA_HEIGHT))
+                if self.stroke.last_point() != pt:
+                    with self.timer.measure("stroke"):
+                        segment = self.stroke.append(pt)
+                        if segment:
+                            pygame.draw.line(self.stroke_surface, DRAWING_COLOR, segment[0], segment[1], 4)
+        
+        if self.live_guesser is not None and self.is_drawing:
+            # Chỉ gửi snapshot khi đến hạn, kết quả đọc lại ở các frame sau nên không chặn vòng lặp
+            self.live_guesser.request(self.stroke, timestamp=self.tracker.latest[1])
+            guess = self.live_guesser.best()
+            if (guess is not None and guess[0] == self.current_word and
+                    guess[1] >= LIVE_GUESS_THRESHOLD and len(self.stroke) > 10):
+                self.submit_guess(guess[0], started=self.live_guesser.best_timestamp())
+        
+        latest = self.camera.read()
+        if latest is None:
             return None
-        image = cv2.flip(image, 1)
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(image_rgb)
-        
-        if results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
-                if (hand_landmarks.landmark[8].y < hand_landmarks.landmark[7].y and
-                    hand_landmarks.landmark[12].y < hand_landmarks.landmark[11].y and
-                    hand_landmarks.landmark[16].y < hand_landmarks.landmark[15].y):
-                    if len(self.points) > 10:
-                        self.recognize_drawing()
-                else:
-                    self.is_drawing = True
-                    pt = (int(hand_landmarks.landmark[8].x * CAMERA_WIDTH),
-                          int(hand_landmarks.landmark[8].y * CAMERA_HEIGHT))
-                    self.points.append(pt)
-                    for i in range(1, len(self.points)):
-                        cv2.line(self.canvas, self.points[i-1], self.points[i], (255, 255, 255), 5)
-        
-        return image_rgb
-        
-    def recognize_drawing(self):
+        image, timestamp, sequence = latest
+        if sequence != self.frame_sequence:
+            self.frame_sequence, self.frame_timestamp = sequence, timestamp
+            # Tuổi của frame lúc được hiển thị: từ lúc camera đọc xong đến bây giờ
+            self.timer.add("frame_age", self.camera.age())
+            with self.timer.measure("present"):
+                self.frame_surface = self.presenter.present(image)
+        return self.frame_surface
+        
+    def clear_drawing(self):
+        self.stroke.clear()
+        if self.live_guesser is not None:
+            self.live_guesser.cancel()
+        self.stroke_surface.fill((0, 0, 0, 0))
+        
+    def recognize_drawing(self, started=None):
         self.is_drawing = False
-        canvas_gs = cv2.cvtColor(self.canvas, cv2.COLOR_BGR2GRAY)
-        canvas_gs = cv2.medianBlur(canvas_gs, 9)
-        canvas_gs = cv2.GaussianBlur(canvas_gs, (5, 5), 0)
-        ys, xs = np.nonzero(canvas_gs)
-        if len(ys) == 0 or len(xs) == 0:
+        if self.recognizer.input_kind == "strokes":
+            # Model chuỗi nét nhận mảng (x, y, pen) được scale về 0..255 và rút gọn bằng RDP như dữ liệu QuickDraw
+            drawing = self.stroke.to_quickdraw()
+        else:
+            # Chỉ xử lý vùng bbox của nét vẽ thay vì cả canvas
+            drawing = preprocess_canvas(self.canvas, self.stroke.bbox)
+        if drawing is None or len(drawing) < 2:
             return
-        min_y, max_y = np.min(ys), np.max(ys)
-        min_x, max_x = np.min(xs), np.max(xs)
-        cropped = canvas_gs[min_y:max_y+1, min_x:max_x+1]
-        cropped = cv2.resize(cropped, (28, 28))
-        cropped = cropped.reshape(1, 28, 28, 1).astype('float32') / 255.0
-        predictions = model.predict(cropped)
-        self.predicted_class = np.argmax(predictions[0])
-        predicted_word = CLASSES[self.predicted_class]
+        predicted_word, _ = self.recognizer.top_k(drawing, k=1)[0]
+        self.submit_guess(predicted_word, started)
+        
+    def submit_guess(self, predicted_word, started=None):
+        self.is_drawing = False
+        self.predicted_class = predicted_word
+        if started is not None:
+            self.verdict_latencies.append(self.tracker.clock() - started)
         
         if predicted_word == self.current_word:
             self.handle_correct_guess()
         else:
             self.handle_wrong_guess()
             
-        self.points.clear()
-        self.canvas.fill(0)
+        self.clear_drawing()
         
     def handle_correct_guess(self):
         self.streak += 1
@@ -388,7 +574,7 @@ class DrawingGame:
         if self.correct_sound:
             self.correct_sound.play()
         self.create_particles(SCREEN_WIDTH//2, CAMERA_RECT.centery, 100)
-        threading.Thread(target=self.speak, args=(self.current_word,)).start()
+        self.speak(self.current_word)
         if self.level_progress >= 5:
             self.level = min(self.level + 1, MAX_LEVELS)
             self.level_progress = 0
@@ -414,14 +600,8 @@ class DrawingGame:
             self.save_high_score()
             
     def draw_menu(self):
-        for y in range(SCREEN_HEIGHT):
-            color = (BG_COLOR[0] + y//30, BG_COLOR[1] + y//20, BG_COLOR[2] + y//10)
-            pygame.draw.line(self.screen, color, (0, y), (SCREEN_WIDTH, y))
-        title = self.title_font.render("Draw & Learn English", True, ACCENT_COLOR)
-        shadow = self.title_font.render("Draw & Learn English", True, (0, 0, 0))
-        self.screen.blit(shadow, (SCREEN_WIDTH//2 - title.get_width()//2 + 3, 53))
-        self.screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 50))
-        high_text = self.main_font.render(f"Best Score: {self.high_score}", True, TEXT_COLOR)
+        self.screen.blit(self.menu_background, (0, 0))
+        high_text = self.render_text(self.main_font, f"Best Score: {self.high_score}", TEXT_COLOR)
         self.screen.blit(high_text, (SCREEN_WIDTH//2 - high_text.get_width()//2, 130))
         
         mouse_pos = pygame.mouse.get_pos()
@@ -432,41 +612,33 @@ class DrawingGame:
         self.start_button.draw(self.screen)
         self.instructions_button.draw(self.screen)
         self.exit_button.draw(self.screen)
-        
-        footer = self.small_font.render("Use your hand to draw in the air!", True, (200, 200, 200))
-        self.screen.blit(footer, (SCREEN_WIDTH//2 - footer.get_width()//2, SCREEN_HEIGHT - 50))
+        if not self.booted:
+            self.draw_loading()
         
         if mouse_click:
             if self.start_button.is_clicked(mouse_pos, mouse_click):
-                self.state = "game"
-                self.reset_game()
+                # Chỉ vào game khi model, camera và nhận diện tay đã sẵn sàng
+                if self.booted:
+                    self.state = "game"
+                    self.reset_game()
             elif self.instructions_button.is_clicked(mouse_pos, mouse_click):
                 self.state = "instructions"
             elif self.exit_button.is_clicked(mouse_pos, mouse_click):
                 return False
         return True
         
+    def draw_loading(self):
+        pending = [name for name in self.loader.tasks if not self.loader.done(name)]
+        if not self.speech.ready.is_set():
+            pending.append("voice")
+        text = self.render_text(self.small_font, f"Loading {', '.join(pending)}...", (200, 200, 200))
+        self.screen.blit(text, (SCREEN_WIDTH//2 - text.get_width()//2, 500))
+        bar_rect = pygame.Rect(SCREEN_WIDTH//2 - 150, 540, 300, 10)
+        pygame.draw.rect(self.screen, (100, 100, 100), bar_rect)
+        pygame.draw.rect(self.screen, PRIMARY_COLOR, (bar_rect.x, bar_rect.y, bar_rect.width * self.loader.progress, 10))
+        
     def draw_instructions(self):
-        self.screen.fill(BG_COLOR)
-        title = self.header_font.render("How to Play", True, ACCENT_COLOR)
-        self.screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 50))
-        instructions = [
-            "1. Draw the English word shown at the top",
-            "2. Use your hand in the air to draw:",
-            "   - Open hand: Draw",
-            "   - Close fingers: Submit drawing",
-            "3. Correct guesses earn points + bonuses",
-            "4. Wrong guesses lose lives",
-            "5. Level up every 5 correct answers",
-            "6. Time decreases as you level up",
-            "7. Get hints for early levels",
-            "8. Streak of 3+ correct gives bonus!"
-        ]
-        y_pos = 150
-        for line in instructions:
-            text = self.main_font.render(line, True, TEXT_COLOR)
-            self.screen.blit(text, (50, y_pos))
-            y_pos += 40
+        self.screen.blit(self.instructions_background, (0, 0))
         mouse_pos = pygame.mouse.get_pos()
         mouse_click = pygame.mouse.get_pressed()[0]
         self.back_button.update(mouse_pos)
@@ -484,18 +656,9 @@ class DrawingGame:
         shake_offset = (random.randint(-5, 5), random.randint(-5, 5)) if self.shake_timer > 0 else (0, 0)
         self.shake_timer = max(0, self.shake_timer - 1)
         
-        word_text = self.main_font.render(f"Draw: {self.current_word}", True, ACCENT_COLOR)
-        self.screen.blit(word_text, (30 + shake_offset[0], 20 + shake_offset[1]))
-        score_text = self.main_font.render(f"Score: {self.score}", True, TEXT_COLOR)
-        self.screen.blit(score_text, (30 + shake_offset[0], 60 + shake_offset[1]))
-        time_text = self.main_font.render(f"Time: {int(self.time_left)}", True, TEXT_COLOR)
-        self.screen.blit(time_text, (SCREEN_WIDTH//2 - time_text.get_width()//2 + shake_offset[0], 20 + shake_offset[1]))
-        level_text = self.main_font.render(f"Level: {self.level}/{MAX_LEVELS}", True, TEXT_COLOR)
-        self.screen.blit(level_text, (SCREEN_WIDTH//2 - level_text.get_width()//2 + shake_offset[0], 60 + shake_offset[1]))
-        lives_text = self.main_font.render(f"Lives: {'❤️' * self.lives}", True, ERROR_COLOR if self.lives == 1 else TEXT_COLOR)
-        self.screen.blit(lives_text, (SCREEN_WIDTH - 150 + shake_offset[0], 20 + shake_offset[1]))
-        streak_text = self.main_font.render(f"Streak: {self.streak}", True, SUCCESS_COLOR if self.streak >= 3 else TEXT_COLOR)
-        self.screen.blit(streak_text, (SCREEN_WIDTH - 150 + shake_offset[0], 60 + shake_offset[1]))
+        # HUD chỉ render lại khi một trong các giá trị hiển thị thay đổi
+        hud_state = (self.current_word, self.score, int(self.time_left), self.level, self.lives, self.streak)
+        self.screen.blit(self.hud.update(hud_state, self.draw_hud), shake_offset)
         
         # Progress bar
         progress_bar_rect = pygame.Rect(SCREEN_WIDTH//2 - 100, 80, 200, 10)
@@ -504,23 +667,21 @@ class DrawingGame:
         pygame.draw.rect(self.screen, SUCCESS_COLOR, (progress_bar_rect.x, progress_bar_rect.y, fill_width, 10))
         
         if frame_surf:
-            cam_surf = pygame.transform.scale(frame_surf, (CAMERA_WIDTH, CAMERA_HEIGHT))
-            self.screen.blit(cam_surf, (CAMERA_RECT.topleft[0] + shake_offset[0], CAMERA_RECT.topleft[1] + shake_offset[1]))
-        for i in range(1, len(self.points)):
-            pt1 = (self.points[i-1][0] + CAMERA_RECT.x + shake_offset[0], self.points[i-1][1] + CAMERA_RECT.y + shake_offset[1])
-            pt2 = (self.points[i][0] + CAMERA_RECT.x + shake_offset[0], self.points[i][1] + CAMERA_RECT.y + shake_offset[1])
-            pygame.draw.line(self.screen, DRAWING_COLOR, pt1, pt2, 4)
-        
-        for particle in self.particles[:]:
-            particle.update()
-            particle.draw(self.screen)
-            if particle.life <= 0:
-                self.particles.remove(particle)
+            self.screen.blit(frame_surf, (CAMERA_RECT.topleft[0] + shake_offset[0], CAMERA_RECT.topleft[1] + shake_offset[1]))
+        self.screen.blit(self.stroke_surface, (CAMERA_RECT.x + shake_offset[0], CAMERA_RECT.y + shake_offset[1]))
+        
+        guess = self.live_guesser.best() if self.live_guesser is not None else None
+        if guess is not None:
+            guess_text = self.render_text(self.small_font, f"Guess: {guess[0]} ({int(guess[1] * 100)}%)", PRIMARY_COLOR)
+            self.screen.blit(guess_text, (CAMERA_RECT.x + 20, CAMERA_RECT.y + 20))
+        
+        self.particles.update()
+        self.particles.draw(self.screen)
                 
         if self.level_up_timer > 0:
             blink = self.level_up_timer % 10 < 5
             if blink:
-                level_up_text = self.header_font.render(f"Level Up! Now Level {self.level}", True, SUCCESS_COLOR)
+                level_up_text = self.render_text(self.header_font, f"Level Up! Now Level {self.level}", SUCCESS_COLOR)
                 self.screen.blit(level_up_text, (SCREEN_WIDTH//2 - level_up_text.get_width()//2, SCREEN_HEIGHT//2))
             self.level_up_timer -= 1
         
@@ -536,8 +697,7 @@ class DrawingGame:
                 self.state = "menu"
                 self.save_high_score()
             elif self.clear_button.is_clicked(mouse_pos, mouse_click):
-                self.points.clear()
-                self.canvas.fill(0)
+                self.clear_drawing()
                 
         if self.show_word_info:
             self.draw_word_info()
@@ -547,30 +707,36 @@ class DrawingGame:
         # Vẽ icon success overlay
         if self.success_icon_timer > 0:
             alpha = min(255, self.success_icon_timer * 8)  # Fade in/out
-            surface = pygame.Surface((100, 100), pygame.SRCALPHA)
-            pygame.draw.circle(surface, SUCCESS_COLOR, (50, 50), 50)
-            pygame.draw.line(surface, TEXT_COLOR, (30, 50), (45, 65), 10)
-            pygame.draw.line(surface, TEXT_COLOR, (45, 65), (70, 35), 10)
-            surface.set_alpha(alpha)
-            self.screen.blit(surface, (SCREEN_WIDTH//2 - 50, SCREEN_HEIGHT//2 - 50))
+            self.success_icon.set_alpha(alpha)
+            self.screen.blit(self.success_icon, (SCREEN_WIDTH//2 - 50, SCREEN_HEIGHT//2 - 50))
             self.success_icon_timer -= 1
             
         return True
         
+    def draw_hud(self, surface):
+        word_text = self.render_text(self.main_font, f"Draw: {self.current_word}", ACCENT_COLOR)
+        surface.blit(word_text, (30, 20))
+        score_text = self.render_text(self.main_font, f"Score: {self.score}", TEXT_COLOR)
+        surface.blit(score_text, (30, 60))
+        time_text = self.render_text(self.main_font, f"Time: {int(self.time_left)}", TEXT_COLOR)
+        surface.blit(time_text, (SCREEN_WIDTH//2 - time_text.get_width()//2, 20))
+        level_text = self.render_text(self.main_font, f"Level: {self.level}/{MAX_LEVELS}", TEXT_COLOR)
+        surface.blit(level_text, (SCREEN_WIDTH//2 - level_text.get_width()//2, 60))
+        lives_text = self.render_text(self.main_font, f"Lives: {'❤️' * self.lives}", ERROR_COLOR if self.lives == 1 else TEXT_COLOR)
+        surface.blit(lives_text, (SCREEN_WIDTH - 150, 20))
+        streak_text = self.render_text(self.main_font, f"Streak: {self.streak}", SUCCESS_COLOR if self.streak >= 3 else TEXT_COLOR)
+        surface.blit(streak_text, (SCREEN_WIDTH - 150, 60))
+        
     def draw_word_info(self):
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))
-        self.screen.blit(overlay, (0, 0))
-        info_box = pygame.Rect(SCREEN_WIDTH//4, INFO_HEIGHT + 50, SCREEN_WIDTH//2, SCREEN_HEIGHT - INFO_HEIGHT - 200)
-        pygame.draw.rect(self.screen, (40, 70, 120), info_box, border_radius=15)
-        pygame.draw.rect(self.screen, PRIMARY_COLOR, info_box, 3, border_radius=15)
+        self.screen.blit(self.word_info_overlay, (0, 0))
+        info_box = self.word_info_box
         
         word = self.current_word
         data = self.word_data[word]
-        word_text = self.main_font.render(word, True, ACCENT_COLOR)
-        pron_text = self.ipa_font.render(data['pron'], True, ACCENT_COLOR)
-        trans_text = self.main_font.render(data['translation'], True, TEXT_COLOR)
-        example_text = self.small_font.render(data['example'], True, (200, 200, 255))
+        word_text = self.render_text(self.main_font, word, ACCENT_COLOR)
+        pron_text = self.render_text(self.ipa_font, data['pron'], ACCENT_COLOR)
+        trans_text = self.render_text(self.main_font, data['translation'], TEXT_COLOR)
+        example_text = self.render_text(self.small_font, data['example'], (200, 200, 255))
         
         word_x = SCREEN_WIDTH//2 - (word_text.get_width() + pron_text.get_width() + 10)//2
         self.screen.blit(word_text, (word_x, info_box.y + 30))
@@ -587,46 +753,41 @@ class DrawingGame:
         
         if mouse_click:
             if self.speaker_button.is_clicked(mouse_pos, mouse_click):
-                threading.Thread(target=self.speak, args=(self.current_word,)).start()
+                self.speak(self.current_word)
             elif self.continue_button.is_clicked(mouse_pos, mouse_click):
-                self.show_word_info = False
-                self.current_word = random.choice(LEVEL_WORDS[self.level])
-                self.time_left = self.time_limit
-                self.hint_given = False
+                self.next_word()
+                
+    def next_word(self):
+        self.show_word_info = False
+        self.current_word = random.choice(LEVEL_WORDS[self.level])
+        self.time_left = self.time_limit
+        self.hint_given = False
                 
     def draw_game_over(self):
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 200))
-        self.screen.blit(overlay, (0, 0))
-        game_over_box = pygame.Rect(SCREEN_WIDTH//4, SCREEN_HEIGHT//3, SCREEN_WIDTH//2, SCREEN_HEIGHT//3)
-        pygame.draw.rect(self.screen, (80, 30, 30), game_over_box, border_radius=15)
-        pygame.draw.rect(self.screen, ERROR_COLOR, game_over_box, 3, border_radius=15)
-        
-        game_over_text = self.header_font.render("Game Over", True, ERROR_COLOR)
-        self.screen.blit(game_over_text, (SCREEN_WIDTH//2 - game_over_text.get_width()//2, SCREEN_HEIGHT//3 + 30))
-        score_text = self.main_font.render(f"Final Score: {self.score}", True, TEXT_COLOR)
+        self.screen.blit(self.game_over_overlay, (0, 0))
+        score_text = self.render_text(self.main_font, f"Final Score: {self.score}", TEXT_COLOR)
         self.screen.blit(score_text, (SCREEN_WIDTH//2 - score_text.get_width()//2, SCREEN_HEIGHT//3 + 100))
-        high_score_text = self.main_font.render(f"Best Score: {self.high_score}", True, TEXT_COLOR)
+        high_score_text = self.render_text(self.main_font, f"Best Score: {self.high_score}", TEXT_COLOR)
         self.screen.blit(high_score_text, (SCREEN_WIDTH//2 - high_score_text.get_width()//2, SCREEN_HEIGHT//3 + 150))
         
         badge_y = SCREEN_HEIGHT//3 + 190
         scale = 1 + 0.1 * abs((pygame.time.get_ticks() % 1000 - 500) / 500)
         if self.level >= 5:
-            badge_text = self.main_font.render("Sketch Novice!", True, SUCCESS_COLOR)
+            badge_text = self.render_text(self.main_font, "Sketch Novice!", SUCCESS_COLOR)
             scaled_text = pygame.transform.scale(badge_text, (int(badge_text.get_width() * scale), int(badge_text.get_height() * scale)))
             self.screen.blit(scaled_text, (SCREEN_WIDTH//2 - scaled_text.get_width()//2, badge_y))
             badge_y += 40
         if self.level >= 10:
-            badge_text = self.main_font.render("Draw Master!", True, SUCCESS_COLOR)
+            badge_text = self.render_text(self.main_font, "Draw Master!", SUCCESS_COLOR)
             scaled_text = pygame.transform.scale(badge_text, (int(badge_text.get_width() * scale), int(badge_text.get_height() * scale)))
             self.screen.blit(scaled_text, (SCREEN_WIDTH//2 - scaled_text.get_width()//2, badge_y))
             badge_y += 40
         if self.level >= 15:
-            badge_text = self.main_font.render("English Draw Legend!", True, SUCCESS_COLOR)
+            badge_text = self.render_text(self.main_font, "English Draw Legend!", SUCCESS_COLOR)
             scaled_text = pygame.transform.scale(badge_text, (int(badge_text.get_width() * scale), int(badge_text.get_height() * scale)))
             self.screen.blit(scaled_text, (SCREEN_WIDTH//2 - scaled_text.get_width()//2, badge_y))
         
-        menu_button = Button(SCREEN_WIDTH//2 - 100, SCREEN_HEIGHT//3 + 310, 200, 50, "Menu", color=PRIMARY_COLOR)
+        menu_button = self.game_over_menu_button
         mouse_pos = pygame.mouse.get_pos()
         mouse_click = pygame.mouse.get_pressed()[0]
         menu_button.update(mouse_pos)
@@ -635,56 +796,143 @@ class DrawingGame:
         if mouse_click and menu_button.is_clicked(mouse_pos, mouse_click):
             self.state = "menu"
             
-    def run(self):
+    def step(self):
+        """Một frame của vòng lặp game, trả về False khi cần thoát."""
+        frame_start = time.perf_counter()
+        if not self.booted and self.loader.ready:
+            self.finish_boot()
         running = True
-        while running:
-            for event in pygame.event.get():
-                if event.type == QUIT:
-                    running = False
-                elif event.type == KEYDOWN:
-                    if event.key == K_ESCAPE:
-                        if self.state == "game":
-                            self.state = "menu"
-                            self.save_high_score()
-                        else:
-                            running = False
-            
-            frame = self.process_frame()
-            frame_surf = pygame.surfarray.make_surface(frame.swapaxes(0, 1)) if frame is not None else None
-            
-            if self.state == "game" and self.game_active and not self.game_over:
-                self.time_left -= 1 / FPS
-                if self.time_left <= 0:
-                    self.lives -= 1
-                    self.shake_timer = FPS // 2
-                    self.time_left = self.time_limit
-                    if self.lives <= 0:
-                        self.game_over = True
-                        self.game_active = False
+        for event in pygame.event.get():
+            if event.type == QUIT:
+                running = False
+            elif event.type == KEYDOWN:
+                if event.key == DEBUG_KEY:
+                    self.show_debug = not self.show_debug
+                elif event.key == K_ESCAPE:
+                    if self.state == "game":
+                        self.state = "menu"
                         self.save_high_score()
-            
-            if self.state == "menu":
-                running = self.draw_menu()
-            elif self.state == "instructions":
-                running = self.draw_instructions()
-            elif self.state == "game":
-                running = self.draw_game(frame_surf)
-            
+                    else:
+                        running = False
+        
+        frame_surf = self.process_frame()
+        
+        if self.state == "game" and self.game_active and not self.game_over:
+            self.time_left -= 1 / FPS
+            if self.time_left <= 0:
+                self.lives -= 1
+                self.shake_timer = FPS // 2
+                self.time_left = self.time_limit
+                if self.lives <= 0:
+                    self.game_over = True
+                    self.game_active = False
+                    self.save_high_score()
+        
+        draw_start = time.perf_counter()
+        if self.state == "menu":
+            running = self.draw_menu() and running
+        elif self.state == "instructions":
+            running = self.draw_instructions() and running
+        elif self.state == "game":
+            running = self.draw_game(frame_surf) and running
+        self.timer.add("draw", time.perf_counter() - draw_start)
+        if self.show_debug:
+            self.draw_debug()
+        
+        with self.timer.measure("flip"):
             pygame.display.flip()
+        if self.first_frame_time is None:
+            self.first_frame_time = time.perf_counter() - BOOT_START
+            print(f"First interactive frame after {self.first_frame_time:.2f}s")
+        self.collect_worker_timings()
+        self.timer.add("frame", time.perf_counter() - frame_start)
+        if self.metrics is not None:
+            self.metrics.maybe_dump(self.timer)
+        return running
+        
+    def collect_worker_timings(self):
+        # Camera, nhận diện tay và đoán trực tiếp chạy trên thread riêng, chỉ lấy độ trễ của kết quả mới
+        if self.camera is not None and self.camera.frames_read != self.camera_frames:
+            self.camera_frames = self.camera.frames_read
+            self.timer.add("capture", self.camera.latency)
+            if self.camera.interval > 0:
+                self.timer.add("cam_interval", self.camera.interval)
+            self.timer.set_counter("camera_frames", self.camera.frames_read)
+            self.timer.set_counter("camera_dropped", self.camera.frames_dropped)
+        if self.tracker is not None and self.tracker.results_published != self.hands_published:
+            self.hands_published = self.tracker.results_published
+            self.timer.add("hands", self.tracker.latency)
+        if self.live_guesser is not None and self.live_guesser.inferences != self.live_inferences:
+            self.live_inferences = self.live_guesser.inferences
+            self.timer.add("live_guess", self.live_guesser.latency)
+            self.timer.set_counter("live_dropped", self.live_guesser.requests_dropped)
+            self.timer.set_counter("live_errors", self.live_guesser.errors)
+        
+    def draw_debug(self):
+        stats = self.timer.stats()
+        # Số liệu chỉ cập nhật 4 lần mỗi giây để chữ đọc được và không phải render lại liên tục
+        state = int(time.perf_counter() * 4)
+        # Bảng cao theo số dòng (tiêu đề + các bước + các bộ đếm), tạo lại khi có bước hoặc bộ đếm mới
+        height = 16 + (1 + len(stats) + len(self.timer.counters)) * 22
+        if self.debug_overlay is None or self.debug_overlay.surface.get_height() != height:
+            self.debug_overlay = DirtySurface(pygame.Surface((360, height), pygame.SRCALPHA))
+        
+        def draw(surface):
+            surface.fill((0, 0, 0, 170))
+            lines = ["stage          p50    p95    p99 ms"]
+            for stage, values in stats.items():
+                lines.append(f"{stage:<12} {values['p50']:6.1f} {values['p95']:6.1f} {values['p99']:6.1f}")
+            for name, value in self.timer.counters.items():
+                lines.append(f"{name:<19} {value:>9}")
+            for i, line in enumerate(lines):
+                surface.blit(self.render_text(self.debug_font, line, TEXT_COLOR), (10, 8 + i * 22))
+        
+        self.screen.blit(self.debug_overlay.update(state, draw), (SCREEN_WIDTH - 370, INFO_HEIGHT + 10))
+        
+    def run(self):
+        running = True
+        while running:
+            running = self.step()
             self.clock.tick(FPS)
         
         self.cleanup()
         
     def cleanup(self):
-        self.cap.release()
-        self.hands.close()
-        try:
-            self.tts_engine.stop()
-            self.tts_engine.endLoop()
-        except:
-            pass
+        if self.live_guesser is not None:
+            self.live_guesser.stop()
+        if self.tracker is not None:
+            self.tracker.stop()
+        if self.camera is not None:
+            self.camera.stop()
+        if self.hands is not None:
+            self.hands.close()
+        self.speech.stop()
+        if self.metrics is not None:
+            self.metrics.dump(self.timer)
+        if self.recorder is not None:
+            self.recorder.save()
+            print(f"Saved {len(self.recorder)} tracking results to {self.recorder.path}")
         pygame.quit()
 
+def get_args():
+    parser = argparse.ArgumentParser("Draw & Learn English")
+    parser.add_argument("--model", type=str, default=None,
+                        help="Recognizer to load, e.g. models/quickdraw_model.int8.onnx from quantize.py "
+                             "(default: models/quickdraw_model.onnx, or the .h5 model if there is no .onnx)")
+    parser.add_argument("--record", type=str, default=None,
+                        help="Save the hand tracking results of this session to a .npz file for replay.py")
+    parser.add_argument("--record_frames", action="store_true",
+                        help="Also save the (downscaled, JPEG) camera frames with --record")
+    parser.add_argument("--metrics", type=str, default=None,
+                        help="Periodically write per-stage latency percentiles to this file")
+    parser.add_argument("--metrics_format", type=str, choices=["jsonl", "prom"], default="jsonl",
+                        help="jsonl appends one line per dump, prom rewrites a Prometheus text file")
+    args = parser.parse_args()
+    return args
+
 if __name__ == "__main__":
-    game = DrawingGame()
+    opt = get_args()
+    recorder = SessionRecorder(opt.record, frames=opt.record_frames) if opt.record else None
+    metrics = MetricsExporter(opt.metrics, METRICS_INTERVAL, opt.metrics_format) if opt.metrics else None
+    game = DrawingGame(recorder=recorder, metrics=metrics, model_path=opt.model)
     game.run()
\ No newline at end of file
@@ -1,26 +1,27 @@
 import cv2
-from collections import deque
 import mediapipe as mp
 import numpy as np
 from src.utils import get_images, get_overlay
 from src.config import *
-import tensorflow as tf  # Thay thế torch bằng tensorflow
+from src.preprocess import preprocess_canvas
+from src.recognizer import Recognizer
+from src.stroke import StrokeBuffer
 
 # Khởi tạo MediaPipe
 mp_drawing = mp.solutions.drawing_utils
 mp_drawing_styles = mp.solutions.drawing_styles
 mp_hands = mp.solutions.hands
 
-# Load TensorFlow model thay vì PyTorch
-model = tf.keras.models.load_model("models/quickdraw_model.h5")  # Đường dẫn đến model của bạn
-with open('class_names.txt', 'r') as f:  # Load class names của bạn
-    CLASSES = f.read().split('\n')
+# Load model: file .onnx từ export.py (đã kèm danh sách class) hoặc model Keras .h5
+recognizer = Recognizer()
+CLASSES = recognizer.classes
 
-predicted_class = None
+predicted_word = None
 
 cap = cv2.VideoCapture(0)
-points = deque(maxlen=512)
-canvas = np.zeros((480, 640, 3), dtype=np.uint8)
+canvas = np.zeros((480, 640), dtype=np.uint8)
+# Model dạng chuỗi nét (strokes) không cần raster lên canvas
+stroke = StrokeBuffer(None if recognizer.input_kind == "strokes" else canvas, color=255)
 is_drawing = False
 is_shown = False
 class_images = get_images("images", CLASSES)  # Đảm bảo thư mục images chứa ảnh đại diện cho các class của bạn
@@ -51,44 +52,32 @@ with mp_hands.Hands(
                     hand_landmarks.landmark[12].y < hand_landmarks.landmark[11].y and 
                     hand_landmarks.landmark[16].y < hand_landmarks.landmark[15].y):
                     
-                    if len(points):
+                    stroke.pen_up()
+                    if len(stroke):
                         is_drawing = False
                         is_shown = True
                         
-                        # Tiền xử lý ảnh để phù hợp với model TensorFlow
-                        canvas_gs = cv2.cvtColor(canvas, cv2.COLOR_BGR2GRAY)
-                        canvas_gs = cv2.medianBlur(canvas_gs, 9)
-                        canvas_gs = cv2.GaussianBlur(canvas_gs, (5, 5), 0)
-                        
-                        ys, xs = np.nonzero(canvas_gs)
-                        if len(ys) and len(xs):
-                            min_y = np.min(ys)
-                            max_y = np.max(ys)
-                            min_x = np.min(xs)
-                            max_x = np.max(xs)
-                            
-                            cropped_image = canvas_gs[min_y:max_y, min_x:max_x]
-                            cropped_image = cv2.resize(cropped_image, (28, 28))
-                            
-                            # Chuẩn bị input cho TensorFlow model
-                            cropped_image = cropped_image.reshape(1, 28, 28, 1).astype('float32') / 255.0
-                            
+                        if recognizer.input_kind == "strokes":
+                            # Mảng (x, y, pen) scale về 0..255 và rút gọn bằng RDP như dữ liệu QuickDraw
+                            drawing = stroke.to_quickdraw()
+                        else:
+                            # Tiền xử lý ảnh (chỉ trong bbox của nét vẽ) để phù hợp với model
+                            drawing = preprocess_canvas(canvas, stroke.bbox)
+                        if drawing is not None and len(drawing) > 1:
                             # Dự đoán
-                            predictions = model.predict(cropped_image)
-                            predicted_class = np.argmax(predictions[0])
+                            predicted_word, _ = recognizer.top_k(drawing, k=1)[0]
                             
-                            points = deque(maxlen=512)
-                            canvas = np.zeros((480, 640, 3), dtype=np.uint8)
+                            stroke.clear()
                 else:
                     is_drawing = True
                     is_shown = False
-                    points.append((int(hand_landmarks.landmark[8].x*640), 
-                                 int(hand_landmarks.landmark[8].y*480)))
+                    # Chỉ đoạn mới được vẽ thêm lên canvas
+                    stroke.append((int(hand_landmarks.landmark[8].x*640), 
+                                   int(hand_landmarks.landmark[8].y*480)))
                     
-                    # Vẽ các điểm
-                    for i in range(1, len(points)):
-                        cv2.line(image, points[i - 1], points[i], (0, 255, 0), 2)
-                        cv2.line(canvas, points[i - 1], points[i], (255, 255, 255), 5)
+                    # Vẽ các điểm lên ảnh hiển thị bằng một lệnh duy nhất
+                    if len(stroke) > 1:
+                        cv2.polylines(image, stroke.strokes(), False, (0, 255, 0), 2)
                 
                 # Vẽ landmarks
                 mp_drawing.draw_landmarks(
@@ -101,12 +90,12 @@ with mp_hands.Hands(
                 # Hiển thị kết quả
                 if not is_drawing and is_shown:
                     # Hiển thị kết quả dạng text thay vì ảnh
-                    cv2.putText(image, f'Recognized: {CLASSES[predicted_class]}', 
+                    cv2.putText(image, f'Recognized: {predicted_word}', 
                             (100, 50), cv2.FONT_HERSHEY_SIMPLEX, 
                             1, GREEN_RGB, 2, cv2.LINE_AA)
                     
                     # Hiển thị thêm tên class lớn hơn
-                    cv2.putText(image, CLASSES[predicted_class], 
+                    cv2.putText(image, predicted_word, 
                             (490, 50), cv2.FONT_HERSHEY_SIMPLEX, 
                             1, YELLOW_RGB, 2, cv2.LINE_AA)
 
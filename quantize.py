@@ -0,0 +1,110 @@
+"""
+Quantize the exported ONNX recognizer to int8 and compare it against the float32 artifact
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import onnx
+from onnxruntime.quantization import CalibrationDataReader, QuantType, quant_pre_process, quantize_dynamic, quantize_static
+
+from src.dataset import MyDataset
+from src.recognizer import ONNX_MODEL_PATH, QUANTIZED_MODEL_PATH, Recognizer
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        """Post-training int8 quantization of the exported Quick Draw recognizer""")
+    parser.add_argument("--model", type=str, default=ONNX_MODEL_PATH, help="a float32 .onnx file written by export.py")
+    parser.add_argument("--output", type=str, default=QUANTIZED_MODEL_PATH)
+    parser.add_argument("--mode", type=str, choices=["dynamic", "static"], default="static",
+                        help="dynamic: int8 weights, activations quantized on the fly; "
+                             "static: int8 weights and activations, calibrated on test samples")
+    parser.add_argument("--calibration_samples", type=int, default=500,
+                        help="number of test samples used to calibrate activation ranges in static mode")
+    parser.add_argument("--latency_runs", type=int, default=500, help="single-sample inferences timed per model")
+    parser.add_argument("--total_images_per_class", type=int, default=10000)
+    parser.add_argument("--ratio", type=float, default=0.8, help="the ratio between training and test sets")
+    parser.add_argument("--data_path", type=str, default="data", help="the root folder of dataset, or a shard written by convert_data.py")
+    parser.add_argument("--storage", type=str, choices=["mmap", "packed"], default="packed")
+    args = parser.parse_args()
+    return args
+
+
+class DatasetCalibrationReader(CalibrationDataReader):
+    """Feeds evenly spaced MyDataset samples, one per call, in the exported model's input layout."""
+
+    def __init__(self, dataset, input_name, num_samples):
+        self.dataset = dataset
+        self.input_name = input_name
+        indices = np.linspace(0, len(dataset) - 1, min(num_samples, len(dataset))).astype(np.int64)
+        self.indices = iter(indices)
+
+    def get_next(self):
+        index = next(self.indices, None)
+        if index is None:
+            return None
+        images, _ = self.dataset.get_batch([index])
+        return {self.input_name: images.astype(np.float32) / 255}
+
+
+def measure(path, dataset, latency_runs):
+    start = time.perf_counter()
+    recognizer = Recognizer(path, warm_up_runs=0)
+    load_time = time.perf_counter() - start
+
+    images, labels = dataset.get_batch(np.arange(len(dataset)))
+    images = images[:, 0].astype(np.float32) / 255
+    recognizer.warm_up()
+    latencies = []
+    for i in range(latency_runs):
+        recognizer.predict(images[i % len(images)])
+        latencies.append(recognizer.last_latency)
+
+    # Accuracy through the same single-sample path the game uses, matched by class name
+    correct = 0
+    for image, label in zip(images, labels):
+        predicted = recognizer.classes[int(np.argmax(recognizer.predict(image)))]
+        correct += predicted == dataset.classes[label]
+    return {"size": os.path.getsize(path) / 1024, "load": load_time * 1000,
+            "p50": np.percentile(latencies, 50) * 1000, "p95": np.percentile(latencies, 95) * 1000,
+            "accuracy": correct / len(dataset)}
+
+
+def quantize(opt):
+    if not opt.model.endswith(".onnx"):
+        raise ValueError("Only ONNX artifacts can be quantized, run export.py first")
+    source = onnx.load(opt.model)
+    metadata = {entry.key: entry.value for entry in source.metadata_props}
+    if metadata.get("input", "image") != "image":
+        raise ValueError("{} classifies strokes, MyDataset only has images to calibrate and test with".format(opt.model))
+    test_set = MyDataset(opt.data_path, opt.total_images_per_class, opt.ratio, "test", opt.storage)
+
+    # Shape inference and graph cleanup first, so every MatMul/Conv can be quantized
+    preprocessed = opt.output + ".pre.onnx"
+    quant_pre_process(opt.model, preprocessed)
+    try:
+        if opt.mode == "dynamic":
+            quantize_dynamic(preprocessed, opt.output, weight_type=QuantType.QInt8)
+        else:
+            reader = DatasetCalibrationReader(test_set, source.graph.input[0].name, opt.calibration_samples)
+            quantize_static(preprocessed, opt.output, reader, activation_type=QuantType.QUInt8,
+                            weight_type=QuantType.QInt8, per_channel=True)
+    finally:
+        os.remove(preprocessed)
+    print("{} int8 model written to {}".format(opt.mode, opt.output))
+
+    results = [("float32", measure(opt.model, test_set, opt.latency_runs)),
+               ("int8", measure(opt.output, test_set, opt.latency_runs))]
+    print("{:<10}{:>12}{:>12}{:>12}{:>12}{:>12}".format("model", "size KB", "load ms", "p50 ms", "p95 ms", "accuracy"))
+    for name, result in results:
+        print("{:<10}{:>12.1f}{:>12.1f}{:>12.3f}{:>12.3f}{:>12.4f}".format(
+            name, result["size"], result["load"], result["p50"], result["p95"], result["accuracy"]))
+    print("Test samples: {}. Load the int8 model in the game with: python game.py --model {}".format(
+        len(test_set), opt.output))
+
+
+if __name__ == "__main__":
+    opt = get_args()
+    quantize(opt)
@@ -0,0 +1,92 @@
+"""
+Replay a session recorded with `python game.py --record ...` through the game loop, headless, and report its performance
+"""
+import argparse
+import os
+import random
+import time
+
+import numpy as np
+
+from src.replay import ReplayCamera, ReplaySession, ReplayTracker
+from src.timing import MetricsExporter
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        """Replay a recorded session through DrawingGame without a camera or a display""")
+    parser.add_argument("--session", type=str, required=True, help="a .npz file written by game.py --record")
+    parser.add_argument("--speed", type=float, default=0,
+                        help="replay speed relative to real time, 0 runs as fast as possible")
+    parser.add_argument("--fps", type=int, default=60, help="game frames per second of session time")
+    parser.add_argument("--seed", type=int, default=123, help="seed for the word choice, so runs are comparable")
+    parser.add_argument("--no_auto_continue", action="store_true",
+                        help="stay on the word info screen after a correct guess instead of moving on")
+    parser.add_argument("--model", type=str, default=None, help="recognizer to load instead of the default one")
+    parser.add_argument("--metrics", type=str, default=None,
+                        help="also append the final per-stage latency percentiles to this JSON lines file")
+    args = parser.parse_args()
+    return args
+
+
+def percentiles(values, scale=1000):
+    if len(values) == 0:
+        return "n/a"
+    p50, p95, p99 = np.percentile(np.asarray(values) * scale, [50, 95, 99])
+    return "p50 {:.2f} ms, p95 {:.2f} ms, p99 {:.2f} ms, max {:.2f} ms".format(
+        p50, p95, p99, max(values) * scale)
+
+
+def replay(opt):
+    # The dummy drivers must be selected before pygame is initialized by the game
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import game
+
+    random.seed(opt.seed)
+    session = ReplaySession(opt.session)
+    tracker = ReplayTracker(session)
+    drawing_game = game.DrawingGame(camera=ReplayCamera(session), tracker=tracker, model_path=opt.model,
+                                    save_scores=False)
+    drawing_game.wait_for_boot()
+    drawing_game.state = "game"
+    drawing_game.reset_game()
+
+    frame_interval = 1 / opt.fps
+    frame_times = []
+    start = time.perf_counter()
+    while not session.finished:
+        frame_start = time.perf_counter()
+        session.advance(frame_interval)
+        tracker.sync()
+        if drawing_game.show_word_info and not opt.no_auto_continue:
+            drawing_game.next_word()
+        if not drawing_game.step():
+            break
+        frame_time = time.perf_counter() - frame_start
+        frame_times.append(frame_time)
+        if opt.speed > 0:
+            time.sleep(max(frame_interval / opt.speed - frame_time, 0))
+    elapsed = time.perf_counter() - start
+    drawing_game.cleanup()
+
+    print("Session: {} ({} tracking results, {:.1f} s)".format(opt.session, len(session), session.duration))
+    print("Frames: {} in {:.2f} s, {:.1f} FPS, {:.1f}x real time".format(
+        len(frame_times), elapsed, len(frame_times) / elapsed, session.time / elapsed))
+    print("Frame time: {}".format(percentiles(frame_times)))
+    print("Verdicts: {}, submit-to-verdict latency: {}".format(
+        len(drawing_game.verdict_latencies), percentiles(drawing_game.verdict_latencies)))
+    print("Score: {}, level: {}, lives: {}".format(drawing_game.score, drawing_game.level, drawing_game.lives))
+    print("{:<12}{:>10}{:>10}{:>10}{:>10}".format("stage", "p50 ms", "p95 ms", "p99 ms", "count"))
+    for stage, values in drawing_game.timer.stats().items():
+        print("{:<12}{:>10.2f}{:>10.2f}{:>10.2f}{:>10}".format(
+            stage, values["p50"], values["p95"], values["p99"], values["count"]))
+    for name, value in drawing_game.timer.counters.items():
+        print("{:<42}{:>10}".format(name, value))
+    if opt.metrics:
+        MetricsExporter(opt.metrics).dump(drawing_game.timer)
+
+
+if __name__ == "__main__":
+    opt = get_args()
+    replay(opt)
@@ -0,0 +1,61 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class BackgroundLoader:
+    """Runs slow startup tasks (imports, model loading) on background threads.
+
+    Tasks are added with ``add(name, fn)`` and all started by ``start()``; each runs on
+    its own daemon thread so a slow one does not hold up the others. The render loop
+    polls ``progress`` and ``ready`` without blocking. ``result(name)`` returns a task's
+    return value, re-raising its exception on the calling thread so a failed load is not
+    silently swallowed by the worker.
+    """
+
+    def __init__(self):
+        self.tasks = OrderedDict()
+        self.results = {}
+        self.errors = {}
+        self.durations = {}
+        self._threads = []
+
+    def add(self, name, fn):
+        self.tasks[name] = fn
+        return self
+
+    def start(self):
+        for name, fn in self.tasks.items():
+            thread = threading.Thread(target=self._run, args=(name, fn), name=f"boot-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def _run(self, name, fn):
+        start = time.perf_counter()
+        try:
+            self.results[name] = fn()
+        except Exception as e:
+            self.errors[name] = e
+        self.durations[name] = time.perf_counter() - start
+
+    def done(self, name):
+        return name in self.durations
+
+    @property
+    def progress(self):
+        return len(self.durations) / len(self.tasks) if self.tasks else 1.0
+
+    @property
+    def ready(self):
+        return len(self.durations) == len(self.tasks)
+
+    def wait(self, timeout=None):
+        for thread in self._threads:
+            thread.join(timeout)
+        return self.ready
+
+    def result(self, name):
+        if name in self.errors:
+            raise self.errors[name]
+        return self.results[name]
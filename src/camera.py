@@ -0,0 +1,82 @@
+import threading
+import time
+
+import cv2
+
+
+class CameraStream:
+    """Owns a ``cv2.VideoCapture`` and reads it on a background thread.
+
+    Only the newest frame is kept: the reader thread replaces a single
+    ``(frame, timestamp, sequence)`` tuple, and consumers grab that reference. Assigning
+    a tuple is atomic under the GIL, so neither side ever waits on a lock. Frames that
+    are overwritten before anyone reads them are counted as dropped. ``latency`` is how
+    long the last ``cap.read()`` took and ``interval`` the time between the last two frames.
+
+    ``pause()`` stops reading (the device stays open) until ``resume()``.
+    """
+
+    def __init__(self, source=0):
+        self.cap = cv2.VideoCapture(source)
+        self.latest = None
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.latency = 0.0
+        self.interval = 0.0
+        self._last_consumed = 0
+        self._active = threading.Event()
+        self._active.set()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._reader, name="camera", daemon=True)
+        self._thread.start()
+        return self
+
+    def _reader(self):
+        while self._running and self.cap.isOpened():
+            if not self._active.wait(0.1):
+                continue
+            start = time.perf_counter()
+            success, frame = self.cap.read()
+            if not success:
+                time.sleep(0.005)
+                continue
+            timestamp = time.perf_counter()
+            self.latency = timestamp - start
+            if self.latest is not None:
+                self.interval = timestamp - self.latest[1]
+            self.frames_read += 1
+            self.latest = (frame, timestamp, self.frames_read)
+
+    def pause(self):
+        self._active.clear()
+
+    def resume(self):
+        self._active.set()
+
+    def read(self):
+        """Return ``(frame, timestamp, sequence)`` of the newest frame, or None before the first one.
+
+        The same frame is returned again until the camera delivers a new one, compare
+        ``sequence`` to tell them apart.
+        """
+        latest = self.latest
+        if latest is not None and latest[2] != self._last_consumed:
+            self.frames_dropped += latest[2] - self._last_consumed - 1
+            self._last_consumed = latest[2]
+        return latest
+
+    def age(self):
+        """Seconds since the newest frame was captured."""
+        latest = self.latest
+        return time.perf_counter() - latest[1] if latest is not None else None
+
+    def stop(self):
+        self._running = False
+        self._active.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        self.cap.release()
@@ -0,0 +1,38 @@
+import os
+import random
+
+import numpy as np
+import torch
+
+CHECKPOINT_FILE = "checkpoint.pt"
+BEST_MODEL_FILE = "best_model.pt"
+SEQUENCE_MODEL_FILE = "best_sequence_model.pt"
+
+
+def save_checkpoint(path, state):
+    """torch.save ``state`` next to ``path`` and rename it into place, so a crash never leaves a torn file."""
+    tmp_path = path + ".tmp"
+    torch.save(state, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path, map_location="cpu"):
+    # Checkpoints hold the Python and NumPy RNG states, which weights_only loading rejects
+    return torch.load(path, map_location=map_location, weights_only=False)
+
+
+def get_rng_state():
+    state = {"python": random.getstate(),
+             "numpy": np.random.get_state(),
+             "torch": torch.get_rng_state()}
+    if torch.cuda.is_available():
+        state["cuda"] = torch.cuda.get_rng_state_all()
+    return state
+
+
+def set_rng_state(state):
+    random.setstate(state["python"])
+    np.random.set_state(state["numpy"])
+    torch.set_rng_state(state["torch"])
+    if "cuda" in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state["cuda"])
@@ -13,6 +13,11 @@ BLUE_RGB = (255, 0, 0)
 YELLOW_RGB = (0, 255, 255)
 WHITE_RGB = (255, 255, 255)
 
-CLASSES = ["apple", "book", "bowtie", "candle", "cloud", "cup", "door", "envelope", 
-           "eyeglasses", "guitar", "hammer", "hat", "ice cream", "leaf", "scissors", 
-           "star", "t-shirt", "pants", "lightning", "tree"]
+# The words of the game, in the order of class_names.txt (the output order of the Keras model),
+# so a model trained and exported from this list can recognize every word the game asks for
+CLASSES = ["square", "bowtie", "diamond", "baseball", "moon", "t-shirt", "star", "scissors", "pants",
+           "leaf", "lightning", "hat", "fish", "envelope", "eye", "door", "cup", "book", "apple"]
+# The classes models were trained on before, e.g. trained_models/whole_model_quickdraw (20 outputs)
+LEGACY_CLASSES = ["apple", "book", "bowtie", "candle", "cloud", "cup", "door", "envelope",
+                  "eyeglasses", "guitar", "hammer", "hat", "ice cream", "leaf", "scissors",
+                  "star", "t-shirt", "pants", "lightning", "tree"]
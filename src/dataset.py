@@ -1,32 +1,258 @@
+import itertools
+import json
+import os
 
-from torch.utils.data import Dataset
+import torch
+from torch.utils.data import BatchSampler, DataLoader, Dataset, SequentialSampler
+from torch.utils.data.distributed import DistributedSampler
 import numpy as np
 
 from src.config import CLASSES
+from src.stroke import from_quickdraw, to_sequence
+
+IMAGE_SIZE = 28
+STORAGES = ["mmap", "packed"]
+SHARD_HEADER = "header.json"
+SHARD_IMAGES = "images.npy"
+SHARD_LABELS = "labels.npy"
+
+
+def get_split(total_images_per_class, ratio, mode):
+    """Return (offset, num_images_per_class) of the train/test split inside each class dump."""
+    if mode == "train":
+        return 0, int(total_images_per_class * ratio)
+    return int(total_images_per_class * ratio), int(total_images_per_class * (1 - ratio))
+
+
+def is_shard(path):
+    return os.path.isfile(os.path.join(path, SHARD_HEADER))
+
+
+def load_shard_header(path):
+    with open(os.path.join(path, SHARD_HEADER), "r") as f:
+        return json.load(f)
 
 
 class MyDataset(Dataset):
-    def __init__(self, root_path="data", total_images_per_class=10000, ratio=0.8, mode="train"):
-        self.root_path = root_path
-        self.num_classes = len(CLASSES)
+    """QuickDraw bitmaps backed by the raw ``full_numpy_bitmap_<class>.npy`` dumps or by a shard.
+
+    storage="mmap" maps every class file once (``mmap_mode='r'``) and slices items
+    straight out of the mapping. storage="packed" copies the used
+    ``offset..offset + num_images_per_class`` slices of every class into one
+    contiguous uint8 array on first access. In both cases images stay uint8 until
+    an item is requested.
 
-        if mode == "train":
-            self.offset = 0
-            self.num_images_per_class = int(total_images_per_class * ratio)
+    If ``root_path`` is a shard written by ``convert_data.py`` the split is read from
+    its header (``total_images_per_class`` and ``ratio`` are ignored) and images are
+    memory-mapped from the shard directly, whatever the storage.
+    """
 
+    def __init__(self, root_path="data", total_images_per_class=10000, ratio=0.8, mode="train", storage="mmap"):
+        if storage not in STORAGES:
+            raise ValueError("storage must be one of {}, got {!r}".format(STORAGES, storage))
+        self.root_path = root_path
+        self.storage = storage
+        self.shard = is_shard(root_path)
+
+        if self.shard:
+            header = load_shard_header(root_path)
+            self.classes = header["classes"]
+            split = header["splits"][mode]
+            self.shard_offset = split["offset"]
+            self.num_images_per_class = split["num_images_per_class"]
         else:
-            self.offset = int(total_images_per_class * ratio)
-            self.num_images_per_class = int(total_images_per_class * (1 - ratio))
+            self.classes = CLASSES
+            self.offset, self.num_images_per_class = get_split(total_images_per_class, ratio, mode)
+        self.num_classes = len(self.classes)
         self.num_samples = self.num_images_per_class * self.num_classes
 
+        self._class_files = {}
+        self._images = None
+        self._labels = None
+
     def __len__(self):
         return self.num_samples
 
+    def __getstate__(self):
+        # Memory maps are never shipped to DataLoader workers, each process reopens them lazily
+        state = self.__dict__.copy()
+        state["_class_files"] = {}
+        if self.shard:
+            state["_images"] = None
+            state["_labels"] = None
+        return state
+
+    def pack(self):
+        """Build the packed array now, e.g. in the parent so forked workers share it instead of each packing a copy."""
+        if self.storage == "packed" and not self.shard:
+            self.images
+        return self
+
+    def _class_file(self, class_idx):
+        array = self._class_files.get(class_idx)
+        if array is None:
+            file_ = "{}/full_numpy_bitmap_{}.npy".format(self.root_path, self.classes[class_idx])
+            array = np.load(file_, mmap_mode="r")
+            self._class_files[class_idx] = array
+        return array
+
+    def _load_shard(self):
+        end = self.shard_offset + self.num_samples
+        images = np.load(os.path.join(self.root_path, SHARD_IMAGES), mmap_mode="r")
+        labels = np.load(os.path.join(self.root_path, SHARD_LABELS), mmap_mode="r")
+        self._images = images[self.shard_offset:end]
+        self._labels = labels[self.shard_offset:end]
+
+    @property
+    def images(self):
+        """Contiguous uint8 array of shape (num_samples, 784) holding only the used slices."""
+        if self._images is None:
+            if self.shard:
+                self._load_shard()
+                return self._images
+            images = np.empty((self.num_samples, IMAGE_SIZE * IMAGE_SIZE), dtype=np.uint8)
+            for class_idx in range(self.num_classes):
+                start = class_idx * self.num_images_per_class
+                images[start:start + self.num_images_per_class] = \
+                    self._class_file(class_idx)[self.offset:self.offset + self.num_images_per_class]
+            self._images = images
+            # The packed copy is all we need from now on, drop the per-class mappings
+            self._class_files = {}
+        return self._images
+
+    def get_label(self, item):
+        if self.shard:
+            if self._labels is None:
+                self._load_shard()
+            return int(self._labels[item])
+        return item // self.num_images_per_class
+
+    def get_raw(self, item):
+        """Return the uint8 image of ``item`` as a flat view, without copying."""
+        if self.shard or self.storage == "packed":
+            return self.images[item]
+        return self._class_file(self.get_label(item))[self.offset + item % self.num_images_per_class]
+
+    def get_batch(self, indices):
+        """Gather a whole batch with one fancy-index per backing array.
+
+        Returns uint8 images of shape (B, 1, 28, 28) and int64 labels; scaling to [0, 1]
+        is left to the caller so it happens once on the whole batch tensor.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        if self.shard:
+            images = self.images[indices]
+            labels = self._labels[indices].astype(np.int64)
+        elif self.storage == "packed":
+            images = self.images[indices]
+            labels = indices // self.num_images_per_class
+        else:
+            labels = indices // self.num_images_per_class
+            images = np.empty((len(indices), IMAGE_SIZE * IMAGE_SIZE), dtype=np.uint8)
+            for class_idx in np.unique(labels):
+                mask = labels == class_idx
+                images[mask] = self._class_file(class_idx)[self.offset + indices[mask] % self.num_images_per_class]
+        return images.reshape((-1, 1, IMAGE_SIZE, IMAGE_SIZE)), labels
+
     def __getitem__(self, item):
-        file_ = "{}/full_numpy_bitmap_{}.npy".format(self.root_path, CLASSES[int(item / self.num_images_per_class)])
-        image = np.load(file_).astype(np.float32)[self.offset + (item % self.num_images_per_class)]
+        if isinstance(item, (list, tuple, np.ndarray)):
+            return self.get_batch(item)
+        image = self.get_raw(item).astype(np.float32)
         image /= 255
-        return image.reshape((1, 28, 28)), int(item / self.num_images_per_class)
+        return image.reshape((1, IMAGE_SIZE, IMAGE_SIZE)), self.get_label(item)
+
+
+class StrokeDataset(Dataset):
+    """QuickDraw drawings as stroke sequences, read from the simplified ``<class>.ndjson`` dumps.
+
+    Every drawing is turned into the (N, 3) x, y, pen state array StrokeBuffer records in
+    the game and then into the dx, dy, pen state sequence of ``to_sequence``, which is
+    exactly what Recognizer feeds an exported QuickDrawSequence. The train/test split
+    is taken from the same line ranges as MyDataset's; drawings with fewer than two
+    points are left out and sequences are cut after ``max_length`` steps.
+    """
+
+    def __init__(self, root_path="data/strokes", total_images_per_class=10000, ratio=0.8, mode="train",
+                 max_length=200):
+        self.root_path = root_path
+        self.classes = CLASSES
+        self.num_classes = len(self.classes)
+        offset, num_drawings_per_class = get_split(total_images_per_class, ratio, mode)
+        self.sequences = []
+        self.labels = []
+        for class_idx, class_name in enumerate(self.classes):
+            with open("{}/{}.ndjson".format(root_path, class_name), "r") as f:
+                for line in itertools.islice(f, offset, offset + num_drawings_per_class):
+                    points = from_quickdraw(json.loads(line)["drawing"])
+                    if len(points) < 2:
+                        continue
+                    self.sequences.append(to_sequence(points)[:max_length])
+                    self.labels.append(class_idx)
+
+    def __len__(self):
+        return len(self.sequences)
+
+    def __getitem__(self, item):
+        return self.sequences[item], self.labels[item]
+
+
+def collate_sequences(batch):
+    """Zero-pad a list of (sequence, label) items into (B, L, 3) float32 sequences, int64 lengths and labels."""
+    lengths = torch.tensor([len(sequence) for sequence, _ in batch], dtype=torch.int64)
+    sequences = torch.zeros((len(batch), int(lengths.max()), 3), dtype=torch.float32)
+    for i, (sequence, _) in enumerate(batch):
+        sequences[i, :len(sequence)] = torch.from_numpy(sequence)
+    labels = torch.tensor([label for _, label in batch], dtype=torch.int64)
+    return sequences, lengths, labels
+
+
+class SkippableBatchSampler(BatchSampler):
+    """BatchSampler that leaves out its first ``skip`` batches, used to resume mid-epoch.
+
+    ``skip`` stays in effect until it is changed, ``set_loader_epoch`` sets it for every epoch.
+    """
+
+    skip = 0
+
+    def __iter__(self):
+        return itertools.islice(super().__iter__(), self.skip, None)
+
+
+def get_batch_loader(dataset, batch_size, shuffle, num_replicas=1, rank=0, seed=123, **kwargs):
+    """DataLoader that hands whole index lists to ``MyDataset.get_batch`` instead of collating items.
+
+    Batches come out as (uint8 images, int64 labels) tensors, convert them with
+    ``images.float().div_(255)`` once they are on the target device. Shuffling always
+    goes through DistributedSampler so the order of an epoch only depends on ``seed``
+    and the epoch number, call ``set_loader_epoch`` before each epoch; with
+    ``num_replicas > 1`` every rank only sees its share of the dataset.
+
+    Without shuffling (evaluation) the dataset is split as ``range(rank, N, num_replicas)``
+    instead: DistributedSampler would pad it with repeated samples so that every rank
+    gets the same number of batches, and those duplicates would be counted in the metrics.
+    Ranks may then run a different number of batches, so no collective op may happen
+    per batch.
+
+    The loader gets its own ``generator`` (for the workers' base seed), so starting an
+    epoch does not draw from the global torch RNG and a run resumed mid-epoch with the
+    checkpointed RNG state gets the same dropout masks as the uninterrupted run.
+    """
+    if shuffle:
+        sampler = DistributedSampler(dataset, num_replicas=num_replicas, rank=rank, shuffle=True, seed=seed)
+    elif num_replicas > 1:
+        sampler = range(rank, len(dataset), num_replicas)
+    else:
+        sampler = SequentialSampler(dataset)
+    batch_sampler = SkippableBatchSampler(sampler, batch_size, drop_last=False)
+    return DataLoader(dataset, sampler=batch_sampler, batch_size=None,
+                      generator=torch.Generator().manual_seed(seed), **kwargs)
+
+
+def set_loader_epoch(loader, epoch, skip_batches=0):
+    batch_sampler = loader.sampler
+    batch_sampler.skip = skip_batches
+    if isinstance(batch_sampler.sampler, DistributedSampler):
+        batch_sampler.sampler.set_epoch(epoch)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,31 @@
+import os
+
+import torch.distributed as dist
+
+
+def init_distributed(backend="gloo"):
+    """Join the process group described by the torchrun environment.
+
+    Returns (rank, world_size, local_rank); a plain ``python train.py`` run is rank 0 of 1.
+    """
+    world_size = int(os.environ.get("WORLD_SIZE", 1))
+    if world_size <= 1:
+        return 0, 1, 0
+    dist.init_process_group(backend=backend)
+    return dist.get_rank(), dist.get_world_size(), int(os.environ.get("LOCAL_RANK", 0))
+
+
+def is_distributed():
+    return dist.is_available() and dist.is_initialized()
+
+
+def all_reduce(*tensors):
+    """Sum ``tensors`` in place over all processes, a no-op outside distributed runs."""
+    if is_distributed():
+        for tensor in tensors:
+            dist.all_reduce(tensor)
+
+
+def cleanup_distributed():
+    if is_distributed():
+        dist.destroy_process_group()
@@ -0,0 +1,142 @@
+import threading
+import time
+
+from src.preprocess import crop_canvas, preprocess_canvas
+from src.stroke import to_quickdraw
+
+
+class LiveGuesser:
+    """Re-runs a Recognizer on the drawing in progress, on a worker thread.
+
+    The render loop calls ``request(stroke)`` every frame. It is cheap and never blocks:
+    a snapshot is only taken once ``interval`` seconds have passed since the last one or
+    ``every_points`` new points have been drawn, and it goes into a single pending slot.
+    A newer snapshot replaces one the worker has not picked up yet, so stale requests are
+    dropped instead of queueing behind each other, and ``cancel()`` (call it when the
+    drawing is cleared) discards both the pending request and any result still in flight.
+
+    Inference latency is measured on the worker; when it exceeds ``budget`` of the
+    request interval, the interval is stretched so the worker stays idle at least the rest
+    of the time. The newest guesses are published as one ``(guesses, points, generation,
+    timestamp)`` tuple, where guesses is the ``top_k`` list of (class, probability) pairs
+    and timestamp is the one passed to ``request`` with the snapshot. A request
+    that fails (e.g. a snapshot preprocessing rejects) is logged and counted in ``errors``;
+    the worker carries on with the next one.
+    """
+
+    def __init__(self, recognizer, interval=0.15, every_points=8, budget=0.5, k=3):
+        self.recognizer = recognizer
+        self.interval = interval
+        self.every_points = every_points
+        self.budget = budget
+        self.k = k
+        self.pending = None
+        self.result = None
+        self.latency = 0.0
+        self.inferences = 0
+        self.requests_dropped = 0
+        self.errors = 0
+        self._generation = 0
+        self._last_request = 0.0
+        self._last_points = 0
+        # Guards the pending slot, so a snapshot queued while the worker takes the previous one is never lost
+        self._pending_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._worker, name="live-guess", daemon=True)
+        self._thread.start()
+        return self
+
+    def current_interval(self):
+        """Seconds between two requests, stretched when inference runs over budget."""
+        return max(self.interval, self.latency / self.budget)
+
+    def request(self, stroke, now=None, timestamp=None):
+        """Queue a snapshot of ``stroke`` if one is due; returns True when a request was made.
+
+        ``timestamp`` tells when the drawn data was captured (e.g. the hand tracking
+        timestamp), it comes back with the guess through ``best_timestamp()``.
+        """
+        now = time.perf_counter() if now is None else now
+        points = len(stroke)
+        if points < 2 or points == self._last_points:
+            return False
+        if (now - self._last_request < self.current_interval() and
+                points - self._last_points < self.every_points):
+            return False
+        if self.recognizer.input_kind == "strokes":
+            snapshot = stroke.array.copy()
+        elif stroke.canvas is not None and stroke.bbox is not None:
+            # Only the padded bbox is copied, not the whole canvas
+            snapshot = crop_canvas(stroke.canvas, stroke.bbox).copy()
+        else:
+            return False
+        with self._pending_lock:
+            if self.pending is not None:
+                self.requests_dropped += 1
+            self.pending = (snapshot, points, self._generation, timestamp)
+        self._last_request, self._last_points = now, points
+        self._wake.set()
+        return True
+
+    def cancel(self):
+        with self._pending_lock:
+            self._generation += 1
+            self.pending = None
+        self.result = None
+        self._last_points = 0
+
+    def _worker(self):
+        while self._running:
+            self._wake.wait(0.1)
+            self._wake.clear()
+            with self._pending_lock:
+                pending, self.pending = self.pending, None
+            if pending is None:
+                continue
+            snapshot, points, generation, timestamp = pending
+            if generation != self._generation:
+                continue
+            start = time.perf_counter()
+            try:
+                guesses = self._guess(snapshot)
+            except Exception as e:
+                self.errors += 1
+                print(f"Live guess failed on a {points}-point drawing: {e!r}")
+                continue
+            self.latency = time.perf_counter() - start
+            self.inferences += 1
+            # The drawing was cleared while the worker was busy, the guess belongs to the old one
+            if generation == self._generation:
+                self.result = (guesses, points, generation, timestamp)
+
+    def _guess(self, snapshot):
+        if self.recognizer.input_kind == "strokes":
+            drawing = to_quickdraw(snapshot)
+        else:
+            drawing = preprocess_canvas(snapshot)
+        return self.recognizer.top_k(drawing, self.k) if drawing is not None and len(drawing) > 1 else []
+
+    def best(self):
+        """Return the newest (class, probability) guess for the current drawing, or None."""
+        result = self.result
+        if result is None or result[2] != self._generation or not result[0]:
+            return None
+        return result[0][0]
+
+    def best_timestamp(self):
+        """Return the ``request`` timestamp of the snapshot behind ``best()``, or None."""
+        result = self.result
+        if result is None or result[2] != self._generation:
+            return None
+        return result[3]
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
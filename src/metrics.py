@@ -0,0 +1,84 @@
+import torch
+
+from src.distributed import all_reduce
+
+
+class RunningMetrics:
+    """Loss and accuracy sums kept as tensors on the training device.
+
+    ``update`` only queues device ops, nothing is read back to the host until ``compute``
+    is called, so the training loop does not have to sync on every step. In distributed
+    runs ``compute`` sums the counters over all processes, so every rank must call it.
+    """
+
+    def __init__(self, device=None):
+        self.device = device
+        self.reset()
+
+    def reset(self):
+        self.loss_sum = torch.zeros((), dtype=torch.float64, device=self.device)
+        self.correct = torch.zeros((), dtype=torch.int64, device=self.device)
+        self.total = torch.zeros((), dtype=torch.int64, device=self.device)
+
+    def update(self, loss, predictions, labels):
+        num_samples = labels.size(0)
+        self.loss_sum += loss.detach() * num_samples
+        self.correct += (predictions.detach().argmax(-1) == labels).sum()
+        self.total += num_samples
+
+    def compute(self):
+        all_reduce(self.loss_sum, self.correct, self.total)
+        total = self.total.item()
+        if total == 0:
+            return {"loss": 0.0, "accuracy": 0.0}
+        return {"loss": self.loss_sum.item() / total, "accuracy": self.correct.item() / total}
+
+
+class ConfusionMatrix:
+    """Streaming confusion matrix (rows are true labels, columns predictions) plus a loss sum.
+
+    Memory stays at ``num_classes ** 2`` counters however many samples are evaluated.
+    Like RunningMetrics, ``compute`` sums the counters over all processes.
+    """
+
+    def __init__(self, num_classes, device=None):
+        self.num_classes = num_classes
+        self.device = device
+        self.reset()
+
+    def reset(self):
+        self.matrix = torch.zeros((self.num_classes, self.num_classes), dtype=torch.int64, device=self.device)
+        self.loss_sum = torch.zeros((), dtype=torch.float64, device=self.device)
+
+    def update(self, loss, predictions, labels):
+        self.loss_sum += loss.detach() * labels.size(0)
+        indices = labels * self.num_classes + predictions.detach().argmax(-1)
+        self.matrix += torch.bincount(indices, minlength=self.num_classes ** 2).view(self.num_classes, self.num_classes)
+
+    def compute(self):
+        all_reduce(self.matrix, self.loss_sum)
+        matrix = self.matrix.cpu()
+        total = matrix.sum().item()
+        if total == 0:
+            return {"loss": 0.0, "accuracy": 0.0, "confusion_matrix": str(matrix.numpy())}
+        return {"loss": self.loss_sum.item() / total,
+                "accuracy": matrix.diagonal().sum().item() / total,
+                "confusion_matrix": str(matrix.numpy())}
+
+
+def evaluate(model, loader, criterion, num_classes, device, amp=False, channels_last=False):
+    """Run ``model`` over a batch loader from ``get_batch_loader`` and return the ConfusionMatrix metrics."""
+    confusion_matrix = ConfusionMatrix(num_classes, device)
+    memory_format = torch.channels_last if channels_last else torch.contiguous_format
+    was_training = model.training
+    model.eval()
+    with torch.no_grad():
+        for images, labels in loader:
+            images = images.to(device, non_blocking=True).float().div_(255).contiguous(memory_format=memory_format)
+            labels = labels.to(device, non_blocking=True)
+            with torch.autocast(device_type=device.type, dtype=torch.bfloat16, enabled=amp):
+                predictions = model(images)
+                loss = criterion(predictions, labels)
+            confusion_matrix.update(loss, predictions, labels)
+    model.train(was_training)
+    return confusion_matrix.compute()
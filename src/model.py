@@ -1,6 +1,7 @@
 import torch
 import torch.nn as nn
 from math import pow
+from torch.nn.utils.rnn import pack_padded_sequence, pad_packed_sequence
 
 class QuickDraw(nn.Module):
     def __init__(self, input_size = 28, num_classes = 15):
@@ -16,8 +17,44 @@ class QuickDraw(nn.Module):
     def forward(self, input):
         output = self.conv1(input)
         output = self.conv2(output)
-        output = output.view(output.size(0), -1)
+        # reshape rather than view, the conv output is not contiguous in channels-last mode
+        output = output.reshape(output.size(0), -1)
         output = self.fc1(output)
         output = self.fc2(output)
         output = self.fc3(output)
-        return output
\ No newline at end of file
+        return output
+
+class QuickDrawSequence(nn.Module):
+    """Stroke-based classifier in the style of Google's QuickDraw RNN: 1D convolutions over the
+    (dx, dy, pen state) sequence followed by a bidirectional LSTM, averaged over time."""
+
+    def __init__(self, num_classes=15, hidden_size=128):
+        super(QuickDrawSequence, self).__init__()
+        self.num_classes = num_classes
+        self.conv = nn.Sequential(nn.Conv1d(3, 48, 5, padding=2), nn.ReLU(inplace=True),
+                                  nn.Conv1d(48, 64, 5, padding=2), nn.ReLU(inplace=True),
+                                  nn.Conv1d(64, 96, 3, padding=1), nn.ReLU(inplace=True))
+        self.lstm = nn.LSTM(96, hidden_size, num_layers=2, batch_first=True, bidirectional=True)
+        self.fc = nn.Linear(2 * hidden_size, num_classes)
+
+    def forward(self, input, lengths=None):
+        # input: (batch, length, 3), zero-padded after ``lengths`` steps when sequences differ in length
+        output = input.transpose(1, 2)
+        if lengths is None:
+            output = self.conv(output).transpose(1, 2)
+            output, _ = self.lstm(output)
+            output = output.mean(1)
+        else:
+            # Padded steps are zeroed after every layer, so each sequence sees the same zero
+            # padding at its end as when it is classified alone
+            mask = torch.arange(output.size(2), device=output.device) < lengths.to(output.device).unsqueeze(1)
+            mask = mask.unsqueeze(1).to(output.dtype)
+            for layer in self.conv:
+                output = layer(output) * mask
+            output = output.transpose(1, 2)
+            packed = pack_padded_sequence(output, lengths.cpu(), batch_first=True, enforce_sorted=False)
+            output, _ = self.lstm(packed)
+            output, _ = pad_packed_sequence(output, batch_first=True)
+            output = output.sum(1) / lengths.to(output.device, output.dtype).unsqueeze(1)
+        output = self.fc(output)
+        return output
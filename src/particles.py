@@ -0,0 +1,93 @@
+import numpy as np
+import pygame
+
+
+class ParticleSystem:
+    """Fixed-capacity particle pool whose state lives in NumPy arrays.
+
+    Live particles are packed at the front of the arrays, so ``update`` moves all of them
+    with a handful of vectorized operations and drops dead ones with one boolean mask
+    instead of ``list.remove``. Sprites are pre-rendered once into an atlas indexed by
+    color, radius and alpha level, and ``draw`` hands them to ``Surface.blits`` in one
+    call, so no Surface is allocated per particle or per frame. ``emit`` beyond
+    ``capacity`` live particles silently drops the excess.
+    """
+
+    def __init__(self, colors, capacity=1024, gravity=0.2, max_size=8, alpha_levels=16):
+        self.colors = colors
+        self.capacity = capacity
+        self.gravity = gravity
+        self.max_size = max_size
+        self.alpha_levels = alpha_levels
+        self.rng = np.random.default_rng()
+        self.position = np.zeros((capacity, 2), dtype=np.float32)
+        self.velocity = np.zeros((capacity, 2), dtype=np.float32)
+        self.life = np.zeros(capacity, dtype=np.float32)
+        self.fade = np.zeros(capacity, dtype=np.float32)
+        self.size = np.zeros(capacity, dtype=np.float32)
+        self.color = np.zeros(capacity, dtype=np.int32)
+        self.count = 0
+        self.atlas = self._build_atlas()
+
+    def _build_atlas(self):
+        """atlas[color][radius][alpha level] -> SRCALPHA surface of a filled circle."""
+        atlas = []
+        for color in self.colors:
+            sizes = []
+            for radius in range(self.max_size + 1):
+                levels = []
+                for level in range(self.alpha_levels):
+                    sprite = pygame.Surface((max(radius * 2, 1), max(radius * 2, 1)), pygame.SRCALPHA)
+                    alpha = 255 * (level + 1) // self.alpha_levels
+                    pygame.draw.circle(sprite, (*color, alpha), (radius, radius), radius)
+                    levels.append(sprite)
+                sizes.append(levels)
+            atlas.append(sizes)
+        return atlas
+
+    def __len__(self):
+        return self.count
+
+    def emit(self, x, y, count=50):
+        count = min(count, self.capacity - self.count)
+        if count <= 0:
+            return
+        new = slice(self.count, self.count + count)
+        self.position[new] = (x, y)
+        self.velocity[new, 0] = self.rng.uniform(-3, 3, count)
+        self.velocity[new, 1] = self.rng.uniform(-8, -2, count)
+        self.life[new] = self.rng.integers(30, 61, count)
+        self.fade[new] = self.rng.uniform(2, 4, count)
+        self.size[new] = self.rng.integers(3, 9, count)
+        self.color[new] = self.rng.integers(0, len(self.colors), count)
+        self.count += count
+
+    def update(self):
+        live = slice(0, self.count)
+        self.position[live] += self.velocity[live]
+        self.velocity[live, 1] += self.gravity
+        self.life[live] -= self.fade[live]
+        np.maximum(self.size[live] - 0.05, 0, out=self.size[live])
+        alive = self.life[live] > 0
+        if not alive.all():
+            n = int(alive.sum())
+            for array in (self.position, self.velocity, self.life, self.fade, self.size, self.color):
+                array[:n] = array[live][alive]
+            self.count = n
+
+    def draw(self, surface):
+        if self.count == 0:
+            return
+        live = slice(0, self.count)
+        radius = np.rint(self.size[live]).astype(np.int32)
+        alpha = np.minimum(self.life[live] * 4.25, 255)
+        level = np.clip((alpha * self.alpha_levels / 255).astype(np.int32) - 1, 0, self.alpha_levels - 1)
+        corner = (self.position[live] - radius[:, np.newaxis]).astype(np.int32)
+        atlas = self.atlas
+        surface.blits([(atlas[c][r][a], (px, py))
+                       for c, r, a, (px, py) in zip(self.color[live].tolist(), radius.tolist(),
+                                                    level.tolist(), corner.tolist())
+                       if r > 0], doreturn=False)
+
+    def clear(self):
+        self.count = 0
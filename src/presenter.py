@@ -0,0 +1,31 @@
+import cv2
+import numpy as np
+import pygame
+
+
+class FramePresenter:
+    """Turns BGR camera frames into one persistent, mirrored pygame Surface of ``size``.
+
+    The Surface is created once with ``pygame.image.frombuffer`` on a preallocated BGR
+    buffer, so it always shows whatever is in that buffer and nothing is copied into
+    pygame. Each frame is mirrored into a reused camera-sized buffer and resized straight
+    into the Surface buffer; since the Surface reads the bytes as BGR there is no color
+    conversion step at all. No memory is allocated per frame.
+    """
+
+    def __init__(self, size, interpolation=cv2.INTER_LINEAR):
+        self.size = size
+        self.interpolation = interpolation
+        width, height = size
+        self.buffer = np.zeros((height, width, 3), dtype=np.uint8)
+        self.surface = pygame.image.frombuffer(self.buffer, size, "BGR")
+        self._mirrored = None
+
+    def present(self, frame):
+        """Draw ``frame`` into the buffer and return the Surface that shows it."""
+        if self._mirrored is None or self._mirrored.shape != frame.shape:
+            self._mirrored = np.empty_like(frame)
+        # Mirroring at camera resolution is cheaper than mirroring the resized frame
+        cv2.flip(frame, 1, dst=self._mirrored)
+        cv2.resize(self._mirrored, self.size, dst=self.buffer, interpolation=self.interpolation)
+        return self.surface
@@ -0,0 +1,106 @@
+"""
+Thin inference runtime shared by game.py and mediapipe_app.py
+"""
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from src.stroke import to_sequence
+
+CLASS_NAMES_FILE = "class_names.txt"
+ONNX_MODEL_PATH = "models/quickdraw_model.onnx"
+QUANTIZED_MODEL_PATH = "models/quickdraw_model.int8.onnx"
+KERAS_MODEL_PATH = "models/quickdraw_model.h5"
+
+
+def get_default_model_path():
+    return ONNX_MODEL_PATH if os.path.isfile(ONNX_MODEL_PATH) else KERAS_MODEL_PATH
+
+
+class Recognizer:
+    """Loads an exported ``.onnx`` artifact (see export.py) or, as a fallback, the legacy Keras ``.h5`` model.
+
+    ONNX artifacts carry their class list and input layout in the model metadata and run
+    through onnxruntime, so TensorFlow is only imported for ``.h5`` files. Keras models are
+    called directly through a ``tf.function`` with a fixed single-image signature instead of
+    ``model.predict``, which builds a tf.data pipeline on every call. Both paths are warmed
+    up at load time so the first submit in the game is as fast as the following ones.
+
+    Artifacts exported from a QuickDrawSequence declare ``input_kind == "strokes"``; they
+    classify the (N, 3) x, y, pen state array of a StrokeBuffer directly, no canvas needed.
+
+    ``predict`` may be called from several threads (e.g. the game loop and a LiveGuesser),
+    calls are serialized because they share one preallocated input buffer.
+    """
+
+    def __init__(self, path=None, warm_up_runs=3):
+        self.path = path or get_default_model_path()
+        if self.path.endswith(".onnx"):
+            self._load_onnx()
+        else:
+            self._load_keras()
+        if self.input_kind == "strokes":
+            self._input = np.zeros((1, 8, 3), dtype=np.float32)
+        else:
+            shape = (1, 1, 28, 28) if self.layout == "NCHW" else (1, 28, 28, 1)
+            self._input = np.zeros(shape, dtype=np.float32)
+        self.last_latency = 0.0
+        self._lock = threading.Lock()
+        self.warm_up(warm_up_runs)
+
+    def _load_onnx(self):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        # A single 28x28 image is far too small to gain anything from a thread pool
+        options.intra_op_num_threads = 1
+        self.session = ort.InferenceSession(self.path, options, providers=["CPUExecutionProvider"])
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.classes = json.loads(metadata["classes"])
+        self.layout = metadata.get("layout", "NCHW")
+        self.input_kind = metadata.get("input", "image")
+        input_name = self.session.get_inputs()[0].name
+        self._run = lambda x: self.session.run(None, {input_name: x})[0]
+
+    def _load_keras(self):
+        import tensorflow as tf
+
+        self.model = tf.keras.models.load_model(self.path)
+        with open(CLASS_NAMES_FILE, "r") as f:
+            self.classes = f.read().splitlines()
+        self.layout = "NHWC"
+        self.input_kind = "image"
+        infer = tf.function(lambda x: self.model(x, training=False),
+                            input_signature=[tf.TensorSpec((1, 28, 28, 1), tf.float32)])
+        self._run = lambda x: infer(tf.constant(x)).numpy()
+
+    def warm_up(self, runs=3):
+        for _ in range(runs):
+            self._run(self._input)
+
+    def predict(self, drawing):
+        """Return the class probabilities for one drawing.
+
+        ``drawing`` is a 28x28 float32 image scaled to [0, 1] (see preprocess_canvas), or an
+        (N, 3) stroke array such as ``StrokeBuffer.to_quickdraw()`` when ``input_kind == "strokes"``.
+        """
+        with self._lock:
+            start = time.perf_counter()
+            if self.input_kind == "strokes":
+                inputs = to_sequence(drawing)[np.newaxis]
+            else:
+                self._input.reshape(28, 28)[:] = drawing
+                inputs = self._input
+            probabilities = np.asarray(self._run(inputs))[0]
+            self.last_latency = time.perf_counter() - start
+        return probabilities
+
+    def top_k(self, drawing, k=3):
+        """Return the ``k`` most likely (class, probability) pairs for ``drawing``, best first."""
+        probabilities = self.predict(drawing)
+        indices = np.argsort(probabilities)[::-1][:k]
+        return [(self.classes[i], float(probabilities[i])) for i in indices]
@@ -0,0 +1,57 @@
+from collections import OrderedDict
+
+
+class TextCache:
+    """LRU cache of ``font.render`` results keyed by (font, text, color).
+
+    Rendering text is by far the most expensive thing the menus and the HUD do each frame,
+    and almost every label is the same as in the previous frame. Labels that change (the
+    timer, the score) simply push the oldest entries out once ``max_size`` is reached.
+    """
+
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color):
+        key = (font, text, tuple(color))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = font.render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+
+class DirtySurface:
+    """A surface that is only redrawn when the state it shows changes.
+
+    ``update(state, draw)`` calls ``draw(surface)`` on a cleared surface if ``state``
+    differs from the last one and returns the (possibly unchanged) surface to blit.
+    """
+
+    def __init__(self, surface):
+        self.surface = surface
+        self.state = None
+        self.redraws = 0
+
+    def update(self, state, draw):
+        if state != self.state:
+            self.state = state
+            self.surface.fill((0, 0, 0, 0))
+            draw(self.surface)
+            self.redraws += 1
+        return self.surface
+
+    def invalidate(self):
+        self.state = None
@@ -0,0 +1,179 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from src.tracking import HandTracker
+
+
+class SessionRecorder:
+    """Collects what the HandTracker saw, to replay the same session later without a camera.
+
+    Every tracking result is stored with its timestamp: the (21, 3) landmarks (NaN when no
+    hand was visible) and, if ``frames`` is set, the camera frame downscaled to
+    ``frame_size`` and JPEG-encoded. ``save()`` writes everything into one compressed
+    ``.npz`` file; the JPEG bytes are kept as one flat uint8 array plus offsets so the
+    file loads without pickle.
+    """
+
+    def __init__(self, path, frames=False, frame_size=(320, 240), jpeg_quality=80):
+        self.path = path
+        self.frames = frames
+        self.frame_size = frame_size
+        self.jpeg_quality = jpeg_quality
+        self.timestamps = []
+        self.landmarks = []
+        self.encoded_frames = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def add(self, timestamp, landmarks, frame=None):
+        if landmarks is None:
+            landmarks = np.full((21, 3), np.nan, dtype=np.float32)
+        encoded = None
+        if self.frames and frame is not None:
+            frame = cv2.resize(frame, self.frame_size, interpolation=cv2.INTER_AREA)
+            _, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        with self._lock:
+            self.timestamps.append(timestamp)
+            self.landmarks.append(landmarks)
+            if self.frames:
+                self.encoded_frames.append(encoded.ravel() if encoded is not None else np.zeros(0, dtype=np.uint8))
+
+    def save(self):
+        with self._lock:
+            arrays = {
+                "timestamps": np.asarray(self.timestamps, dtype=np.float64),
+                "landmarks": np.asarray(self.landmarks, dtype=np.float32).reshape(-1, 21, 3),
+            }
+            if self.frames:
+                sizes = [len(encoded) for encoded in self.encoded_frames]
+                arrays["frame_offsets"] = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+                arrays["frame_data"] = (np.concatenate(self.encoded_frames) if self.encoded_frames
+                                        else np.zeros(0, dtype=np.uint8))
+        np.savez_compressed(self.path, **arrays)
+        return self.path
+
+
+class ReplaySession:
+    """A recorded session played back on a virtual clock that starts at 0.
+
+    ``advance(dt)`` moves the clock forward by ``dt`` seconds, however long that takes in
+    real time, so a replay can run faster (or slower) than the recording.
+    """
+
+    def __init__(self, path):
+        with np.load(path) as data:
+            timestamps = data["timestamps"]
+            self.timestamps = timestamps - timestamps[0] if len(timestamps) else timestamps
+            self.landmarks = data["landmarks"]
+            self.frame_offsets = data["frame_offsets"] if "frame_offsets" in data else None
+            self.frame_data = data["frame_data"] if "frame_data" in data else None
+        self.time = 0.0
+        self.index = -1
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @property
+    def duration(self):
+        return float(self.timestamps[-1]) if len(self.timestamps) else 0.0
+
+    @property
+    def finished(self):
+        return self.time > self.duration
+
+    def advance(self, dt):
+        self.time += dt
+        self.index = int(np.searchsorted(self.timestamps, self.time, side="right")) - 1
+
+    def landmarks_at(self, index):
+        landmarks = self.landmarks[index]
+        return None if np.isnan(landmarks[0, 0]) else landmarks
+
+    def frame_at(self, index):
+        if self.frame_offsets is None:
+            return None
+        encoded = self.frame_data[self.frame_offsets[index]:self.frame_offsets[index + 1]]
+        return cv2.imdecode(encoded, cv2.IMREAD_COLOR) if len(encoded) else None
+
+
+class ReplayCamera:
+    """Stands in for CameraStream, serving the frame of the current ReplaySession index.
+
+    Sessions recorded without frames show a black frame of ``size``. ``latency`` is the
+    time the last JPEG took to decode and ``interval`` the session time between the last
+    two frames, the replay counterparts of CameraStream's.
+    """
+
+    def __init__(self, session, size=(640, 480)):
+        self.session = session
+        self.blank = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.latency = 0.0
+        self.interval = 0.0
+        self._cached = (-1, None)
+
+    @property
+    def latest(self):
+        index = self.session.index
+        if index < 0:
+            return None
+        if self._cached[0] != index:
+            start = time.perf_counter()
+            frame = self.session.frame_at(index)
+            self.latency = time.perf_counter() - start
+            if self._cached[0] >= 0:
+                self.interval = float(self.session.timestamps[index] - self.session.timestamps[self._cached[0]])
+                self.frames_dropped += index - self._cached[0] - 1
+            self._cached = (index, frame if frame is not None else self.blank)
+            self.frames_read += 1
+        return self._cached[1], float(self.session.timestamps[index]), index + 1
+
+    def read(self):
+        return self.latest
+
+    def pause(self):
+        pass
+
+    def resume(self):
+        pass
+
+    def age(self):
+        latest = self.latest
+        return self.session.time - latest[1] if latest is not None else None
+
+    def stop(self):
+        pass
+
+
+class ReplayTracker(HandTracker):
+    """HandTracker fed from a ReplaySession instead of a camera and MediaPipe.
+
+    Call ``sync()`` after every ``session.advance``; ``landmarks()`` then interpolates on the
+    session clock exactly like the live tracker does on the real one.
+    """
+
+    def __init__(self, session):
+        super().__init__(camera=None, hands=None)
+        self.session = session
+        self._published = -1
+
+    def start(self):
+        return self
+
+    def sync(self):
+        while self._published < self.session.index:
+            self._published += 1
+            self.publish(self.session.landmarks_at(self._published),
+                         float(self.session.timestamps[self._published]), self._published + 1)
+
+    def clock(self):
+        return self.session.time
+
+    def stop(self):
+        pass
@@ -0,0 +1,129 @@
+import hashlib
+import os
+import threading
+import time
+from collections import deque
+
+import pygame
+
+
+class SpeechWorker:
+    """One long-lived text-to-speech thread that owns the pyttsx3 engine.
+
+    ``say(text)`` never blocks: it puts ``text`` on a queue of at most ``max_pending``
+    entries. A text that is already waiting is not queued twice, and when the queue is
+    full the oldest entry is dropped, since a stale hint is worse than none.
+
+    Every text is synthesized once with ``engine.save_to_file`` into ``cache_dir``, under
+    a file name hashed from the voice, rate and text, and played through
+    ``pygame.mixer``. Repeated prompts, also across runs, play straight from the WAV
+    file. ``prefetch(texts)`` synthesizes texts ahead of time whenever nothing is
+    waiting to be said. The engine is created on the worker thread and never touched
+    from any other thread, because pyttsx3 engines are not thread-safe.
+    """
+
+    def __init__(self, cache_dir="tts_cache", rate=150, voice_keyword="english", max_pending=4):
+        self.cache_dir = cache_dir
+        self.rate = rate
+        self.voice_keyword = voice_keyword
+        self.pending = deque(maxlen=max_pending)
+        self.prefetching = deque()
+        self.sounds = {}
+        self.voice_id = None
+        self.engine = None
+        self.requests_dropped = 0
+        # Set once the engine is up, so a loading screen can show when speech is available
+        self.ready = threading.Event()
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._running = True
+        self._thread = threading.Thread(target=self._worker, name="speech", daemon=True)
+        self._thread.start()
+        return self
+
+    def say(self, text):
+        with self._condition:
+            if text in self.pending:
+                return
+            if len(self.pending) == self.pending.maxlen:
+                self.requests_dropped += 1
+            self.pending.append(text)
+            self._condition.notify()
+
+    def prefetch(self, texts):
+        with self._condition:
+            self.prefetching.extend(texts)
+            self._condition.notify()
+
+    def _init_engine(self):
+        import pyttsx3
+
+        self.engine = pyttsx3.init()
+        self.engine.setProperty('rate', self.rate)
+        for voice in self.engine.getProperty('voices'):
+            if self.voice_keyword in voice.name.lower():
+                self.engine.setProperty('voice', voice.id)
+                break
+        self.voice_id = self.engine.getProperty('voice')
+
+    def cache_path(self, text):
+        key = hashlib.sha1(f"{self.voice_id}|{self.rate}|{text}".encode("utf-8")).hexdigest()[:20]
+        return os.path.join(self.cache_dir, key + ".wav")
+
+    def _synthesize(self, text):
+        path = self.cache_path(text)
+        if not os.path.isfile(path):
+            temp_path = path[:-4] + ".tmp.wav"
+            self.engine.save_to_file(text, temp_path)
+            self.engine.runAndWait()
+            os.replace(temp_path, path)
+        return path
+
+    def _load(self, text):
+        sound = self.sounds.get(text)
+        if sound is None:
+            sound = pygame.mixer.Sound(self._synthesize(text))
+            self.sounds[text] = sound
+        return sound
+
+    def _worker(self):
+        self._init_engine()
+        self.ready.set()
+        while self._running:
+            with self._condition:
+                while self._running and not self.pending and not self.prefetching:
+                    self._condition.wait()
+                if not self._running:
+                    break
+                if self.pending:
+                    text, play = self.pending.popleft(), True
+                else:
+                    text, play = self.prefetching.popleft(), False
+            try:
+                sound = self._load(text)
+            except Exception:
+                # No usable WAV (e.g. a driver that cannot save files), fall back to speaking directly
+                if play:
+                    self.engine.say(text)
+                    self.engine.runAndWait()
+                continue
+            if play:
+                channel = sound.play()
+                # Wait for the prompt to finish so two prompts never talk over each other
+                while channel is not None and channel.get_busy() and self._running:
+                    time.sleep(0.02)
+        try:
+            self.engine.stop()
+        except Exception:
+            pass
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
@@ -0,0 +1,190 @@
+import cv2
+import numpy as np
+
+PEN_DOWN = 0
+PEN_UP = 1
+# The simplified QuickDraw dumps scale every drawing into 0..255 before RDP with epsilon 2
+QUICKDRAW_SIZE = 255
+
+
+def rdp_mask(points, epsilon):
+    """Ramer-Douglas-Peucker simplification of an (N, 2) polyline, returned as a boolean keep mask."""
+    keep = np.zeros(len(points), dtype=bool)
+    if len(points) == 0:
+        return keep
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end <= start + 1:
+            continue
+        chord = points[end] - points[start]
+        offsets = points[start + 1:end] - points[start]
+        length = np.hypot(chord[0], chord[1])
+        if length == 0:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            distances = np.abs(chord[0] * offsets[:, 1] - chord[1] * offsets[:, 0]) / length
+        index = int(np.argmax(distances))
+        if distances[index] > epsilon:
+            middle = start + 1 + index
+            keep[middle] = True
+            stack.append((start, middle))
+            stack.append((middle, end))
+    return keep
+
+
+def simplify(points, epsilon=2.0):
+    """Simplify every stroke of an (N, 3) x, y, pen state array, returning a new (M, 3) array."""
+    keep = np.zeros(len(points), dtype=bool)
+    start = 0
+    for end in list(np.flatnonzero(points[:, 2] == PEN_UP) + 1) + [len(points)]:
+        if end > start:
+            keep[start:end] = rdp_mask(points[start:end, :2], epsilon)
+        start = end
+    simplified = points[keep].copy()
+    if len(simplified):
+        # The last point of the drawing always ends a stroke
+        simplified[-1, 2] = PEN_UP
+    return simplified
+
+
+def to_quickdraw(points, epsilon=2.0, size=QUICKDRAW_SIZE):
+    """Preprocess an (N, 3) x, y, pen state array like the simplified QuickDraw dataset.
+
+    The drawing is moved to the origin, scaled so its longer side is ``size`` and every
+    stroke is simplified with ``epsilon`` in that space, so a sequence model trained on the
+    ndjson dumps sees the same level of detail however large the drawing was on screen.
+    """
+    points = np.array(points, dtype=np.float32)
+    if len(points) == 0:
+        return points
+    xy = points[:, :2]
+    xy -= xy.min(axis=0)
+    scale = xy.max()
+    if scale > 0:
+        xy *= size / scale
+    return simplify(points, epsilon)
+
+
+class StrokeBuffer:
+    """Fingertip points of the current drawing, kept as a float32 (N, 3) array of x, y and pen state.
+
+    The pen state is PEN_UP on the last point of every stroke (``pen_up``) and PEN_DOWN
+    elsewhere, as in the QuickDraw stroke format; a drawing of a few hundred points takes
+    a few KB. The array grows by doubling, so appending is amortized O(1).
+
+    If a ``canvas`` is given, each ``append`` also draws only the segment from the previous
+    point to the new one, so the cost per point is constant instead of redrawing the whole
+    polyline. The bounding box of the ink (stroke thickness included) is tracked as points
+    arrive, which lets recognition crop the canvas without scanning every pixel.
+    """
+
+    def __init__(self, canvas=None, color=(255, 255, 255), thickness=5, capacity=512):
+        self.canvas = canvas
+        self.color = color
+        self.thickness = thickness
+        self.data = np.zeros((capacity, 3), dtype=np.float32)
+        self.size = 0
+        self.bbox = None
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def array(self):
+        """View of the (N, 3) points recorded so far."""
+        return self.data[:self.size]
+
+    def last_point(self):
+        if self.size == 0:
+            return None
+        x, y, _ = self.data[self.size - 1]
+        return int(x), int(y)
+
+    def append(self, point):
+        """Add ``point`` and rasterize its segment; returns the (start, end) segment drawn, or None."""
+        segment = None
+        if self.size and self.data[self.size - 1, 2] == PEN_DOWN:
+            segment = (self.last_point(), point)
+            if self.canvas is not None:
+                cv2.line(self.canvas, segment[0], segment[1], self.color, self.thickness)
+        if self.size == len(self.data):
+            self.data = np.concatenate([self.data, np.zeros_like(self.data)])
+        self.data[self.size] = (point[0], point[1], PEN_DOWN)
+        self.size += 1
+        self._grow_bbox(point)
+        return segment
+
+    def pen_up(self):
+        """End the current stroke, the next point starts a new one instead of being joined to it."""
+        if self.size:
+            self.data[self.size - 1, 2] = PEN_UP
+
+    def strokes(self):
+        """Return the drawing as a list of (n, 2) int32 arrays, one per stroke."""
+        points = self.array
+        ends = np.flatnonzero(points[:, 2] == PEN_UP) + 1
+        return [stroke[:, :2].astype(np.int32) for stroke in np.split(points, ends) if len(stroke)]
+
+    def simplify(self, epsilon=2.0):
+        """Return an (M, 3) copy of the drawing with every stroke simplified by Ramer-Douglas-Peucker."""
+        return simplify(self.array, epsilon)
+
+    def to_quickdraw(self, epsilon=2.0):
+        """Return the drawing preprocessed like the simplified QuickDraw dataset, see ``to_quickdraw``."""
+        return to_quickdraw(self.array, epsilon)
+
+    def _grow_bbox(self, point):
+        radius = self.thickness // 2 + 1
+        x0, y0 = point[0] - radius, point[1] - radius
+        x1, y1 = point[0] + radius, point[1] + radius
+        if self.canvas is not None:
+            # Fingertips may leave the canvas, clamping both corners keeps the box inside it and
+            # never inverted (a point off the canvas then only adds an empty edge row or column)
+            height, width = self.canvas.shape[:2]
+            x0, x1 = min(max(x0, 0), width - 1), min(max(x1, 0), width - 1)
+            y0, y1 = min(max(y0, 0), height - 1), min(max(y1, 0), height - 1)
+        if self.bbox is None:
+            self.bbox = (x0, y0, x1, y1)
+        else:
+            bx0, by0, bx1, by1 = self.bbox
+            self.bbox = (min(bx0, x0), min(by0, y0), max(bx1, x1), max(by1, y1))
+
+    def clear(self):
+        self.size = 0
+        if self.canvas is not None:
+            self.canvas.fill(0)
+        self.bbox = None
+
+
+def from_quickdraw(drawing):
+    """QuickDraw ndjson ``drawing`` ([[x0, x1, ...], [y0, y1, ...]] per stroke) -> float32 (N, 3) x, y, pen state.
+
+    The result has the layout StrokeBuffer records in the game: PEN_UP on the last point
+    of every stroke.
+    """
+    strokes = [np.stack([stroke[0], stroke[1], np.full(len(stroke[0]), PEN_DOWN)], axis=1)
+               for stroke in drawing if len(stroke[0])]
+    if not strokes:
+        return np.zeros((0, 3), dtype=np.float32)
+    for stroke in strokes:
+        stroke[-1, 2] = PEN_UP
+    return np.concatenate(strokes).astype(np.float32)
+
+
+def to_sequence(points):
+    """(N, 3) x, y, pen state -> float32 (N - 1, 3) dx, dy, pen state, the input of QuickDrawSequence.
+
+    Coordinates are scaled into [0, 1] by the larger side of the bounding box first, so the
+    sequence does not depend on where or how big the drawing is on screen.
+    """
+    points = np.asarray(points, dtype=np.float32)
+    sequence = points.copy()
+    xy = sequence[:, :2]
+    xy -= xy.min(axis=0)
+    scale = xy.max()
+    if scale > 0:
+        xy /= scale
+    sequence[1:, :2] -= sequence[:-1, :2]
+    return sequence[1:]
@@ -0,0 +1,102 @@
+import json
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+import numpy as np
+
+QUANTILES = (50, 95, 99)
+
+
+class StageTimer:
+    """Rolling per-stage timings of the game loop.
+
+    Each stage keeps its last ``window`` durations (in seconds); ``stats()`` turns them into
+    p50/p95/p99 in milliseconds. Recording a sample is a deque append, so the hooks can
+    stay in the loop permanently. Event totals that are not durations (e.g. dropped
+    camera frames) are kept as plain ``counters``.
+    """
+
+    def __init__(self, window=300):
+        self.window = window
+        self.samples = OrderedDict()
+        self.counts = {}
+        self.counters = OrderedDict()
+
+    def add(self, stage, seconds):
+        samples = self.samples.get(stage)
+        if samples is None:
+            samples = self.samples[stage] = deque(maxlen=self.window)
+            self.counts[stage] = 0
+        samples.append(seconds)
+        self.counts[stage] += 1
+
+    def set_counter(self, name, value):
+        self.counters[name] = value
+
+    @contextmanager
+    def measure(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def stats(self):
+        """Return {stage: {"p50": ms, "p95": ms, "p99": ms, "count": n}} for every stage seen so far."""
+        stats = OrderedDict()
+        for stage, samples in self.samples.items():
+            if not samples:
+                continue
+            values = np.percentile(np.asarray(samples) * 1000, QUANTILES)
+            stats[stage] = {f"p{q}": round(float(v), 3) for q, v in zip(QUANTILES, values)}
+            stats[stage]["count"] = self.counts[stage]
+        return stats
+
+
+class MetricsExporter:
+    """Periodically writes StageTimer stats to ``path``.
+
+    ``format="jsonl"`` appends one JSON object per dump, so a whole session can be
+    compared against an older one; ``format="prom"`` rewrites the file in the Prometheus
+    text exposition format, suitable for node_exporter's textfile collector.
+    """
+
+    def __init__(self, path, interval=10.0, format="jsonl"):
+        if format not in ("jsonl", "prom"):
+            raise ValueError(f"unknown metrics format: {format}")
+        self.path = path
+        self.interval = interval
+        self.format = format
+        self._last_dump = time.perf_counter()
+
+    def maybe_dump(self, timer, now=None):
+        now = time.perf_counter() if now is None else now
+        if now - self._last_dump < self.interval:
+            return False
+        self.dump(timer)
+        self._last_dump = now
+        return True
+
+    def dump(self, timer):
+        stats = timer.stats()
+        if self.format == "jsonl":
+            with open(self.path, "a") as f:
+                f.write(json.dumps({"time": time.time(), "stages": stats, "counters": timer.counters}) + "\n")
+            return
+        lines = ["# HELP airdraw_stage_milliseconds Rolling per-stage latency of the game loop.",
+                 "# TYPE airdraw_stage_milliseconds summary"]
+        for stage, values in stats.items():
+            for q in QUANTILES:
+                lines.append(f'airdraw_stage_milliseconds{{stage="{stage}",quantile="{q / 100}"}} {values[f"p{q}"]}')
+            lines.append(f'airdraw_stage_milliseconds_count{{stage="{stage}"}} {values["count"]}')
+        lines += ["# HELP airdraw_events_total Event counters of the game loop, e.g. dropped camera frames.",
+                  "# TYPE airdraw_events_total counter"]
+        for name, value in timer.counters.items():
+            lines.append(f'airdraw_events_total{{counter="{name}"}} {value}')
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        # Scrapers must never see a half-written file
+        os.replace(temp_path, self.path)
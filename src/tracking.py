@@ -0,0 +1,115 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+def to_array(hand_landmarks):
+    """MediaPipe NormalizedLandmarkList -> float32 array of shape (21, 3) holding x, y, z."""
+    return np.array([[lm.x, lm.y, lm.z] for lm in hand_landmarks.landmark], dtype=np.float32)
+
+
+class HandTracker:
+    """Runs ``hands.process`` on a worker thread, fed by a CameraStream.
+
+    Each camera frame is downscaled to ``inference_size``, mirrored and converted to
+    RGB before tracking; only every ``frame_skip + 1``-th frame is processed. The
+    newest result is published as one ``(landmarks, timestamp, sequence)`` tuple where
+    landmarks is a (21, 3) array in mirrored, normalized image coordinates or None when
+    no hand is visible. The render loop reads it without blocking through
+    ``landmarks()``, which interpolates between the last two results so the
+    fingertip moves smoothly at the render rate even when tracking runs slower.
+
+    If a ``recorder`` (see src/replay.py) is given, every result is also handed to it
+    together with the camera frame it came from.
+
+    ``pause()`` parks the worker until ``resume()``, so no tracking runs on screens that
+    do not use the landmarks.
+    """
+
+    def __init__(self, camera, hands, inference_size=(320, 240), frame_skip=0, recorder=None):
+        self.camera = camera
+        self.hands = hands
+        self.inference_size = inference_size
+        self.frame_skip = frame_skip
+        self.recorder = recorder
+        # (previous, latest) results, replaced as one tuple so readers always see a consistent pair
+        self.results = ((None, None, 0), (None, None, 0))
+        self.latency = 0.0
+        self.results_published = 0
+        self._last_sequence = 0
+        self._active = threading.Event()
+        self._active.set()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._worker, name="hand-tracker", daemon=True)
+        self._thread.start()
+        return self
+
+    def _worker(self):
+        while self._running:
+            if not self._active.wait(0.1):
+                continue
+            frame = self.camera.latest
+            if frame is None or frame[2] - self._last_sequence <= self.frame_skip:
+                time.sleep(0.001)
+                continue
+            frame, timestamp, sequence = frame
+            self._last_sequence = sequence
+            start = time.perf_counter()
+            image = cv2.resize(frame, self.inference_size, interpolation=cv2.INTER_AREA)
+            image = cv2.flip(image, 1)
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            results = self.hands.process(image)
+            self.latency = time.perf_counter() - start
+            landmarks = to_array(results.multi_hand_landmarks[0]) if results.multi_hand_landmarks else None
+            self.publish(landmarks, timestamp, sequence)
+            if self.recorder is not None:
+                self.recorder.add(timestamp, landmarks, frame)
+
+    def publish(self, landmarks, timestamp, sequence):
+        self.results = (self.results[1], (landmarks, timestamp, sequence))
+        self.results_published += 1
+
+    def pause(self):
+        self._active.clear()
+
+    def resume(self):
+        # Results from before the pause are stale, do not interpolate from them
+        self.results = ((None, None, 0), (None, None, 0))
+        self._active.set()
+
+    @property
+    def latest(self):
+        return self.results[1]
+
+    def clock(self):
+        """Current time on the clock of the result timestamps."""
+        return time.perf_counter()
+
+    def landmarks(self, now=None):
+        """Return the (21, 3) landmarks to draw at ``now`` (default: current time), or None without a hand.
+
+        Results are shown one tracking interval late and linearly interpolated from the
+        previous result to the latest one, which hides the gaps left by frame skipping.
+        """
+        previous, latest = self.results
+        landmarks, timestamp, _ = latest
+        if landmarks is None or previous[0] is None:
+            return landmarks
+        interval = timestamp - previous[1]
+        if interval <= 0:
+            return landmarks
+        now = self.clock() if now is None else now
+        alpha = min(max((now - timestamp) / interval, 0.0), 1.0)
+        return previous[0] + (landmarks - previous[0]) * alpha
+
+    def stop(self):
+        self._running = False
+        self._active.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
@@ -1,4 +1,7 @@
 
+import os
+import re
+
 import cv2
 import numpy as np
 from sklearn import metrics
@@ -19,6 +22,15 @@ def get_evaluation(y_true, y_prob, list_metrics):
     return output
 
 
+def get_best_accuracy(log_file):
+    """Return the best "Test accuracy" written by train.py in ``log_file``, or None."""
+    if not os.path.isfile(log_file):
+        return None
+    with open(log_file, "r") as f:
+        accuracies = [float(value) for value in re.findall(r"Test accuracy: ([0-9.eE+-]+)", f.read())]
+    return max(accuracies) if accuracies else None
+
+
 def get_images(path, classes):
     images = [cv2.imread("{}/{}.png".format(path, item), cv2.IMREAD_UNCHANGED) for item in classes]
     return images
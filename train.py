@@ -6,15 +6,18 @@ import argparse
 import os
 import shutil
 
-import numpy as np
 import torch
 import torch.nn as nn
 from tensorboardX import SummaryWriter
-from torch.utils.data import DataLoader
+from torch.nn.parallel import DistributedDataParallel
 
-from src.dataset import MyDataset
+from src.checkpoint import (BEST_MODEL_FILE, CHECKPOINT_FILE, get_rng_state, load_checkpoint, save_checkpoint,
+                            set_rng_state)
+from src.dataset import MyDataset, get_batch_loader, set_loader_epoch
+from src.distributed import cleanup_distributed, init_distributed
+from src.metrics import RunningMetrics, evaluate
 from src.model import QuickDraw
-from src.utils import get_evaluation
+from src.utils import get_best_accuracy
 
 
 def get_args():
@@ -24,14 +27,33 @@ def get_args():
     parser.add_argument("--total_images_per_class", type=int, default=10000)
     parser.add_argument("--ratio", type=float, default=0.8, help="the ratio between training and test sets")
     parser.add_argument("--batch_size", type=int, default=32)
+    parser.add_argument("--num_workers", type=int, default=0, help="number of data loading worker processes")
+    parser.add_argument("--prefetch_factor", type=int, default=2,
+                        help="batches loaded in advance by each worker, only used when num_workers > 0")
+    parser.add_argument("--persistent_workers", action="store_true", help="keep the workers alive between epochs")
+    parser.add_argument("--pin_memory", action="store_true", help="copy batches into pinned memory for faster transfer to the GPU")
     parser.add_argument("--num_epochs", type=int, default=20)
     parser.add_argument("--lr", type=float,
                         default=0.01)  # recommended learning rate for sgd is 0.01, while for adam is 0.001
+    parser.add_argument("--amp", action="store_true", help="run forward and loss under bfloat16 autocast")
+    parser.add_argument("--compile", action="store_true", help="compile the model with torch.compile")
+    parser.add_argument("--channels_last", action="store_true", help="use the channels-last memory format for the model and images")
+    parser.add_argument("--reference_log", type=str, default=None,
+                        help="logs.txt of a previous run to compare test accuracy against, defaults to the one in saved_path")
+    parser.add_argument("--log_interval", type=int, default=100,
+                        help="number of iterations between two training log lines")
     parser.add_argument("--es_min_delta", type=float, default=0.0,
                         help="Early stopping's parameter: minimum change loss to qualify as an improvement")
     parser.add_argument("--es_patience", type=int, default=3,
                         help="Early stopping's parameter: number of epochs with no improvement after which training will be stopped. Set to 0 to disable this technique.")
-    parser.add_argument("--data_path", type=str, default="data", help="the root folder of dataset")
+    parser.add_argument("--data_path", type=str, default="data", help="the root folder of dataset, or a shard written by convert_data.py")
+    parser.add_argument("--storage", type=str, choices=["mmap", "packed"], default="packed",
+                        help="mmap: slice items out of memory-mapped class files, packed: copy the used slices into one contiguous array")
+    parser.add_argument("--dist_backend", type=str, choices=["gloo", "nccl"], default="gloo",
+                        help="process group backend used when launched with torchrun")
+    parser.add_argument("--checkpoint_interval", type=int, default=1000,
+                        help="number of iterations between two resumable checkpoints, 0 to only save them after each epoch")
+    parser.add_argument("--resume", action="store_true", help="continue from the checkpoint in saved_path")
     parser.add_argument("--log_path", type=str, default="tensorboard")
     parser.add_argument("--saved_path", type=str, default="trained_models")
     args = parser.parse_args()
@@ -39,7 +61,10 @@ def get_args():
 
 
 def train(opt):
+    rank, world_size, local_rank = init_distributed(opt.dist_backend)
+    is_main = rank == 0
     if torch.cuda.is_available():
+        torch.cuda.set_device(local_rank)
         torch.cuda.manual_seed(123)
     else:
         torch.manual_seed(123)
@@ -49,27 +74,61 @@ def train(opt):
     test_params = {"batch_size": opt.batch_size,
                    "shuffle": False}
 
-    output_file = open(opt.saved_path + os.sep + "logs.txt", "w")
-    output_file.write("Model's parameters: {}".format(vars(opt)))
-
-    training_set = MyDataset(opt.data_path, opt.total_images_per_class, opt.ratio, "train")
-    training_generator = DataLoader(training_set, **training_params)
-    print ("there are {} images for training phase".format(training_set.__len__()))
-    test_set = MyDataset(opt.data_path, opt.total_images_per_class, opt.ratio, "test")
-    test_generator = DataLoader(test_set, **test_params)
-    print("there are {} images for test phase".format(test_set.__len__()))
+    # In distributed runs each rank gets 1/world_size of both sets, the test set is split
+    # without padding so the all-reduced test metrics cover every sample exactly once
+    loader_params = {"num_replicas": world_size,
+                     "rank": rank,
+                     "num_workers": opt.num_workers,
+                     "pin_memory": opt.pin_memory}
+    if opt.num_workers > 0:
+        loader_params["prefetch_factor"] = opt.prefetch_factor
+        loader_params["persistent_workers"] = opt.persistent_workers
+    training_params.update(loader_params)
+    test_params.update(loader_params)
+
+    if is_main:
+        # Read the previous run's accuracy before its logs.txt gets overwritten
+        reference_accuracy = get_best_accuracy(opt.reference_log or opt.saved_path + os.sep + "logs.txt")
+        output_file = open(opt.saved_path + os.sep + "logs.txt", "a" if opt.resume else "w")
+        output_file.write("Model's parameters: {}".format(vars(opt)))
+
+    training_set = MyDataset(opt.data_path, opt.total_images_per_class, opt.ratio, "train", opt.storage)
+    if opt.num_workers > 0:
+        training_set.pack()
+    training_generator = get_batch_loader(training_set, **training_params)
+    if is_main:
+        print("there are {} images for training phase".format(training_set.__len__()))
+    test_set = MyDataset(opt.data_path, opt.total_images_per_class, opt.ratio, "test", opt.storage)
+    if opt.num_workers > 0:
+        test_set.pack()
+    test_generator = get_batch_loader(test_set, **test_params)
+    if is_main:
+        print("there are {} images for test phase".format(test_set.__len__()))
 
 
     model = QuickDraw(num_classes=training_set.num_classes)
 
-    if os.path.isdir(opt.log_path):
-        shutil.rmtree(opt.log_path)
-    os.makedirs(opt.log_path)
-    writer = SummaryWriter(opt.log_path)
+    if is_main:
+        if os.path.isdir(opt.log_path) and not opt.resume:
+            shutil.rmtree(opt.log_path)
+        os.makedirs(opt.log_path, exist_ok=True)
+        writer = SummaryWriter(opt.log_path)
     # writer.add_graph(model, torch.rand(opt.batch_size, 1, 28, 28))
 
+    device = torch.device("cuda", local_rank) if torch.cuda.is_available() else torch.device("cpu")
     if torch.cuda.is_available():
         model.cuda()
+    memory_format = torch.channels_last if opt.channels_last else torch.contiguous_format
+    model = model.to(memory_format=memory_format)
+    raw_model = model
+    checkpoint = None
+    if opt.resume:
+        checkpoint = load_checkpoint(opt.saved_path + os.sep + CHECKPOINT_FILE, map_location=device)
+        raw_model.load_state_dict(checkpoint["model"])
+    if world_size > 1:
+        model = DistributedDataParallel(model, device_ids=[local_rank] if torch.cuda.is_available() else None)
+    if opt.compile:
+        model = torch.compile(model)
 
     criterion = nn.CrossEntropyLoss()
     if opt.optimizer == "adam":
@@ -82,74 +141,111 @@ def train(opt):
 
     best_loss = 1e5
     best_epoch = 0
+    best_accuracy = 0
+    start_epoch = 0
+    start_iter = 0
+    if checkpoint is not None:
+        optimizer.load_state_dict(checkpoint["optimizer"])
+        best_loss = checkpoint["best_loss"]
+        best_epoch = checkpoint["best_epoch"]
+        best_accuracy = checkpoint["best_accuracy"]
+        start_epoch = checkpoint["epoch"]
+        start_iter = checkpoint["iteration"]
+        set_rng_state(checkpoint["rng"])
+        if is_main:
+            print("resuming from epoch {}, iteration {}".format(start_epoch + 1, start_iter))
+
+    def get_checkpoint(epoch, iteration):
+        # Only rank 0 saves, so the RNG state of the other ranks is not kept
+        return {"model": raw_model.state_dict(),
+                "optimizer": optimizer.state_dict(),
+                "epoch": epoch,
+                "iteration": iteration,
+                "best_loss": best_loss,
+                "best_epoch": best_epoch,
+                "best_accuracy": best_accuracy,
+                "rng": get_rng_state(),
+                "classes": training_set.classes}
+
     model.train()
     num_iter_per_epoch = len(training_generator)
-    for epoch in range(opt.num_epochs):
-        for iter, batch in enumerate(training_generator):
+    training_metrics = RunningMetrics(device)
+    for epoch in range(start_epoch, opt.num_epochs):
+        # The shuffle order only depends on the epoch, so skipping the batches already seen
+        # puts a resumed run back exactly where the checkpoint was taken
+        set_loader_epoch(training_generator, epoch, start_iter if epoch == start_epoch else 0)
+        for iter, batch in enumerate(training_generator, start_iter if epoch == start_epoch else 0):
             images, labels = batch
             if torch.cuda.is_available():
-                images = images.cuda()
-                labels = labels.cuda()
+                images = images.cuda(non_blocking=True)
+                labels = labels.cuda(non_blocking=True)
+            images = images.float().div_(255).contiguous(memory_format=memory_format)
             optimizer.zero_grad()
-            predictions = model(images)
-            loss = criterion(predictions, labels)
+            with torch.autocast(device_type=device.type, dtype=torch.bfloat16, enabled=opt.amp):
+                predictions = model(images)
+                loss = criterion(predictions, labels)
             loss.backward()
             optimizer.step()
-            training_metrics = get_evaluation(labels.cpu().numpy(), predictions.cpu().detach().numpy(),
-                                              list_metrics=["accuracy"])
-            print("Epoch: {}/{}, Iteration: {}/{}, Lr: {}, Loss: {}, Accuracy: {}".format(
+            training_metrics.update(loss, predictions, labels)
+            if (iter + 1) % opt.log_interval == 0 or iter + 1 == num_iter_per_epoch:
+                # Metrics are averaged over the iterations since the last log line
+                metrics = training_metrics.compute()
+                training_metrics.reset()
+                if is_main:
+                    print("Epoch: {}/{}, Iteration: {}/{}, Lr: {}, Loss: {}, Accuracy: {}".format(
+                        epoch + 1,
+                        opt.num_epochs,
+                        iter + 1,
+                        num_iter_per_epoch,
+                        optimizer.param_groups[0]['lr'],
+                        metrics["loss"], metrics["accuracy"]))
+                    writer.add_scalar('Train/Loss', metrics["loss"], epoch * num_iter_per_epoch + iter)
+                    writer.add_scalar('Train/Accuracy', metrics["accuracy"], epoch * num_iter_per_epoch + iter)
+            if is_main and opt.checkpoint_interval > 0 and (iter + 1) % opt.checkpoint_interval == 0 \
+                    and iter + 1 < num_iter_per_epoch:
+                save_checkpoint(opt.saved_path + os.sep + CHECKPOINT_FILE, get_checkpoint(epoch, iter + 1))
+
+        # Ranks may evaluate a different number of batches, so the DDP wrapper (which syncs
+        # buffers on every forward) is bypassed
+        eval_model = raw_model if world_size > 1 else model
+        test_metrics = evaluate(eval_model, test_generator, criterion, test_set.num_classes, device,
+                                amp=opt.amp, channels_last=opt.channels_last)
+        te_loss = test_metrics["loss"]
+        if is_main:
+            output_file.write(
+                "Epoch: {}/{} \nTest loss: {} Test accuracy: {} \nTest confusion matrix: \n{}\n\n".format(
+                    epoch + 1, opt.num_epochs,
+                    te_loss,
+                    test_metrics["accuracy"],
+                    test_metrics["confusion_matrix"]))
+            print("Epoch: {}/{}, Lr: {}, Loss: {}, Accuracy: {}".format(
                 epoch + 1,
                 opt.num_epochs,
-                iter + 1,
-                num_iter_per_epoch,
                 optimizer.param_groups[0]['lr'],
-                loss, training_metrics["accuracy"]))
-            writer.add_scalar('Train/Loss', loss, epoch * num_iter_per_epoch + iter)
-            writer.add_scalar('Train/Accuracy', training_metrics["accuracy"], epoch * num_iter_per_epoch + iter)
-
-        model.eval()
-        loss_ls = []
-        te_label_ls = []
-        te_pred_ls = []
-        for idx, te_batch in enumerate(test_generator):
-            te_images, te_labels = te_batch
-            num_samples = te_labels.size()[0]
-            if torch.cuda.is_available():
-                te_images = te_images.cuda()
-                te_labels = te_labels.cuda()
-            with torch.no_grad():
-                te_predictions = model(te_images)
-            te_loss = criterion(te_predictions, te_labels)
-            loss_ls.append(te_loss * num_samples)
-            te_label_ls.extend(te_labels.clone().cpu())
-            te_pred_ls.append(te_predictions.clone().cpu())
-        te_loss = sum(loss_ls) / test_set.__len__()
-        te_pred = torch.cat(te_pred_ls, 0)
-        te_label = np.array(te_label_ls)
-        test_metrics = get_evaluation(te_label, te_pred.numpy(), list_metrics=["accuracy", "confusion_matrix"])
-        output_file.write(
-            "Epoch: {}/{} \nTest loss: {} Test accuracy: {} \nTest confusion matrix: \n{}\n\n".format(
-                epoch + 1, opt.num_epochs,
-                te_loss,
-                test_metrics["accuracy"],
-                test_metrics["confusion_matrix"]))
-        print("Epoch: {}/{}, Lr: {}, Loss: {}, Accuracy: {}".format(
-            epoch + 1,
-            opt.num_epochs,
-            optimizer.param_groups[0]['lr'],
-            te_loss, test_metrics["accuracy"]))
-        writer.add_scalar('Test/Loss', te_loss, epoch)
-        writer.add_scalar('Test/Accuracy', test_metrics["accuracy"], epoch)
-        model.train()
+                te_loss, test_metrics["accuracy"]))
+            writer.add_scalar('Test/Loss', te_loss, epoch)
+            writer.add_scalar('Test/Accuracy', test_metrics["accuracy"], epoch)
+        best_accuracy = max(best_accuracy, test_metrics["accuracy"])
         if te_loss + opt.es_min_delta < best_loss:
             best_loss = te_loss
             best_epoch = epoch
-            torch.save(model, opt.saved_path + os.sep + "whole_model_quickdraw")
+            if is_main:
+                torch.save(raw_model, opt.saved_path + os.sep + "whole_model_quickdraw")
+                save_checkpoint(opt.saved_path + os.sep + BEST_MODEL_FILE,
+                                {"model": raw_model.state_dict(), "classes": training_set.classes})
+        if is_main:
+            save_checkpoint(opt.saved_path + os.sep + CHECKPOINT_FILE, get_checkpoint(epoch + 1, 0))
         if epoch - best_epoch > opt.es_patience > 0:
-            print("Stop training at epoch {}. The lowest loss achieved is {}".format(epoch, te_loss))
+            if is_main:
+                print("Stop training at epoch {}. The lowest loss achieved is {}".format(epoch, te_loss))
             break
-    writer.close()
-    output_file.close()
+    if is_main:
+        summary = "Best test accuracy: {} (reference: {})".format(best_accuracy, reference_accuracy)
+        output_file.write(summary + "\n")
+        print(summary)
+        writer.close()
+        output_file.close()
+    cleanup_distributed()
 
 
 if __name__ == "__main__":
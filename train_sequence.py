@@ -0,0 +1,78 @@
+"""
+Train the stroke-based QuickDrawSequence recognizer on the simplified QuickDraw ndjson dumps
+"""
+import argparse
+import os
+
+import torch
+import torch.nn as nn
+from torch.utils.data import DataLoader
+
+from src.checkpoint import SEQUENCE_MODEL_FILE, save_checkpoint
+from src.dataset import StrokeDataset, collate_sequences
+from src.metrics import RunningMetrics
+from src.model import QuickDrawSequence
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        """Train a stroke sequence (Conv1d + BiLSTM) Quick Draw classifier""")
+    parser.add_argument("--total_images_per_class", type=int, default=10000)
+    parser.add_argument("--ratio", type=float, default=0.8, help="the ratio between training and test sets")
+    parser.add_argument("--batch_size", type=int, default=64)
+    parser.add_argument("--num_epochs", type=int, default=10)
+    parser.add_argument("--lr", type=float, default=0.001)
+    parser.add_argument("--max_length", type=int, default=200, help="sequences are cut after this many steps")
+    parser.add_argument("--data_path", type=str, default="data/strokes",
+                        help="folder holding the simplified <class>.ndjson dumps")
+    parser.add_argument("--saved_path", type=str, default="trained_models")
+    args = parser.parse_args()
+    return args
+
+
+def run_epoch(model, loader, criterion, device, optimizer=None):
+    metrics = RunningMetrics(device)
+    model.train(optimizer is not None)
+    with torch.set_grad_enabled(optimizer is not None):
+        for sequences, lengths, labels in loader:
+            sequences, labels = sequences.to(device), labels.to(device)
+            predictions = model(sequences, lengths)
+            loss = criterion(predictions, labels)
+            if optimizer is not None:
+                optimizer.zero_grad()
+                loss.backward()
+                optimizer.step()
+            metrics.update(loss, predictions, labels)
+    return metrics.compute()
+
+
+def train(opt):
+    torch.manual_seed(123)
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    training_set = StrokeDataset(opt.data_path, opt.total_images_per_class, opt.ratio, "train", opt.max_length)
+    test_set = StrokeDataset(opt.data_path, opt.total_images_per_class, opt.ratio, "test", opt.max_length)
+    print("there are {} drawings for training phase and {} for test phase".format(len(training_set), len(test_set)))
+    training_generator = DataLoader(training_set, opt.batch_size, shuffle=True, collate_fn=collate_sequences)
+    test_generator = DataLoader(test_set, opt.batch_size, shuffle=False, collate_fn=collate_sequences)
+
+    model = QuickDrawSequence(num_classes=training_set.num_classes).to(device)
+    criterion = nn.CrossEntropyLoss()
+    optimizer = torch.optim.Adam(model.parameters(), lr=opt.lr)
+    os.makedirs(opt.saved_path, exist_ok=True)
+    best_loss = 1e5
+    for epoch in range(opt.num_epochs):
+        train_metrics = run_epoch(model, training_generator, criterion, device, optimizer)
+        test_metrics = run_epoch(model, test_generator, criterion, device)
+        print("Epoch: {}/{}, Train loss: {}, Train accuracy: {}, Test loss: {}, Test accuracy: {}".format(
+            epoch + 1, opt.num_epochs, train_metrics["loss"], train_metrics["accuracy"],
+            test_metrics["loss"], test_metrics["accuracy"]))
+        if test_metrics["loss"] < best_loss:
+            best_loss = test_metrics["loss"]
+            # "arch" tells export.py to build a QuickDrawSequence for these weights
+            save_checkpoint(opt.saved_path + os.sep + SEQUENCE_MODEL_FILE,
+                            {"model": model.state_dict(), "classes": training_set.classes, "arch": "sequence"})
+
+
+if __name__ == "__main__":
+    opt = get_args()
+    train(opt)